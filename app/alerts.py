@@ -0,0 +1,139 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from app.models import AlertRule, AlertThreshold, WeatherData
+from app.thresholds import ThresholdIndex, RuleIndex, threshold_index, rule_index
+
+METRICS = {"temp": 0, "feels_like": 1, "condition": 2}
+OPERATORS = {"gt": 0, "lt": 1, "eq": 2}
+
+class FiredRule(NamedTuple):
+    rule: AlertRule
+    weather_data: WeatherData
+
+def threshold_rules(threshold: AlertThreshold) -> List[AlertRule]:
+    # Legacy per-city thresholds are compiled as ordinary single-reading rules
+    rules = []
+    if threshold.max_temp is not None:
+        rules.append(AlertRule(id=f"threshold:{threshold.city}:max_temp", city=threshold.city,
+                               metric="temp", operator="gt", value=threshold.max_temp))
+    if threshold.min_temp is not None:
+        rules.append(AlertRule(id=f"threshold:{threshold.city}:min_temp", city=threshold.city,
+                               metric="temp", operator="lt", value=threshold.min_temp))
+    if threshold.weather_condition:
+        rules.append(AlertRule(id=f"threshold:{threshold.city}:condition", city=threshold.city,
+                               metric="condition", weather_condition=threshold.weather_condition))
+    return rules
+
+def describe(rule: AlertRule, weather_data: WeatherData) -> str:
+    if rule.metric == "condition":
+        message = f"Weather condition alert: {weather_data.main} matches alert condition"
+    else:
+        label = "temperature" if rule.metric == "temp" else "feels-like temperature"
+        reading = getattr(weather_data, rule.metric)
+        if rule.operator == "gt":
+            message = f"High {label} alert: {reading:.1f}°C exceeds threshold of {rule.value}°C"
+        else:
+            message = f"Low {label} alert: {reading:.1f}°C is below threshold of {rule.value}°C"
+    if rule.consecutive_readings > 1:
+        message += f" for {rule.consecutive_readings} consecutive readings"
+    return message
+
+# Evaluates every rule against a batch of readings in one vectorized pass.
+#
+# Rules are compiled into parallel NumPy arrays (city, metric, operator, value,
+# condition, required streak). A batch of readings is laid out per city code, so
+# each rule gathers its city's reading by fancy indexing and all comparisons run
+# as array operations. Per-rule streaks live in memory; a rule fires only when
+# its streak reaches consecutive_readings, so a condition that persists produces
+# one alert rather than one per cycle until the streak breaks.
+class AlertEngine:
+    def __init__(self, thresholds: ThresholdIndex, rules: RuleIndex):
+        self.thresholds = thresholds
+        self.rules = rules
+        self._compiled_version: Optional[Tuple[int, int]] = None
+        self._rule_ids: List[str] = []
+        self._streak = np.zeros(0, dtype=np.int32)
+        self.compile([])
+
+    def compile(self, rules: List[AlertRule]):
+        previous = dict(zip(self._rule_ids, self._streak.tolist()))
+
+        self._rules = rules
+        self._rule_ids = [rule.id for rule in rules]
+        self._city_codes: Dict[str, int] = {}
+        self._condition_codes: Dict[str, int] = {}
+        for rule in rules:
+            self._city_codes.setdefault(rule.city, len(self._city_codes))
+            if rule.weather_condition:
+                self._condition_codes.setdefault(rule.weather_condition, len(self._condition_codes))
+
+        self._city = np.fromiter((self._city_codes[r.city] for r in rules), dtype=np.int32, count=len(rules))
+        self._metric = np.fromiter((METRICS[r.metric] for r in rules), dtype=np.int8, count=len(rules))
+        self._operator = np.fromiter((OPERATORS[r.operator] for r in rules), dtype=np.int8, count=len(rules))
+        self._value = np.fromiter((r.value if r.value is not None else np.nan for r in rules), dtype=np.float64, count=len(rules))
+        self._condition = np.fromiter(
+            (self._condition_codes[r.weather_condition] if r.metric == "condition" else -1 for r in rules),
+            dtype=np.int32, count=len(rules))
+        self._required = np.fromiter((r.consecutive_readings for r in rules), dtype=np.int32, count=len(rules))
+        # Streaks survive recompilation for rules that still exist
+        self._streak = np.fromiter((previous.get(rule_id, 0) for rule_id in self._rule_ids), dtype=np.int32, count=len(rules))
+
+    def refresh(self):
+        # Recompiles when the thresholds or rules have changed since the last compile
+        version = (self.thresholds.version, self.rules.version)
+        if version != self._compiled_version:
+            rules = [rule for threshold in self.thresholds.all() for rule in threshold_rules(threshold)]
+            rules.extend(self.rules.all())
+            self.compile(rules)
+            self._compiled_version = version
+
+    def evaluate(self, readings: List[WeatherData]) -> List[FiredRule]:
+        self.refresh()
+        if not self._rules:
+            return []
+
+        # Several readings for one city are applied in arrival order, one round each
+        rounds: List[Dict[int, WeatherData]] = []
+        for weather_data in readings:
+            code = self._city_codes.get(weather_data.city)
+            if code is None:
+                continue
+            for round_readings in rounds:
+                if code not in round_readings:
+                    round_readings[code] = weather_data
+                    break
+            else:
+                rounds.append({code: weather_data})
+
+        fired = []
+        for round_readings in rounds:
+            fired.extend(self._evaluate_round(round_readings))
+        return fired
+
+    def _evaluate_round(self, round_readings: Dict[int, WeatherData]) -> List[FiredRule]:
+        cities = len(self._city_codes)
+        present = np.zeros(cities, dtype=bool)
+        metrics = np.full((2, cities), np.nan)
+        conditions = np.full(cities, -2, dtype=np.int32)  # -2 never equals a rule's code
+        for code, weather_data in round_readings.items():
+            present[code] = True
+            metrics[0, code] = weather_data.temp
+            metrics[1, code] = weather_data.feels_like
+            conditions[code] = self._condition_codes.get(weather_data.main, -2)
+
+        has_reading = present[self._city]
+        numeric = metrics[np.minimum(self._metric, 1), self._city]
+        hit = np.where(
+            self._metric == METRICS["condition"],
+            conditions[self._city] == self._condition,
+            np.where(self._operator == OPERATORS["gt"], numeric > self._value, numeric < self._value),
+        ) & has_reading
+
+        self._streak = np.where(has_reading, np.where(hit, self._streak + 1, 0), self._streak).astype(np.int32)
+        firing = np.flatnonzero(hit & (self._streak == self._required))
+        return [FiredRule(self._rules[i], round_readings[self._city[i]]) for i in firing]
+
+    def stats(self) -> dict:
+        return {"rules": len(self._rules), "cities": len(self._city_codes), "active_streaks": int(np.count_nonzero(self._streak))}
+
+alert_engine = AlertEngine(threshold_index, rule_index)
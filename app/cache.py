@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from app.config import config
+from app.models import WeatherData
+
+# In-process cache of the latest reading per city. The ingestion cycle fills it,
+# so API reads are normally served without calling OpenWeatherMap. Concurrent
+# misses for the same city share a single in-flight fetch, and the least
+# recently used cities are evicted once max_entries is reached.
+class LatestWeatherCache:
+    def __init__(self, max_staleness: float, max_entries: int):
+        self.max_staleness = max_staleness
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, WeatherData]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def put(self, weather_data: WeatherData):
+        self._entries[weather_data.city] = (time.monotonic(), weather_data)
+        self._entries.move_to_end(weather_data.city)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, city: str) -> Optional[WeatherData]:
+        entry = self._entries.get(city)
+        if entry is None:
+            return None
+        stored_at, weather_data = entry
+        if time.monotonic() - stored_at > self.max_staleness:
+            return None
+        self._entries.move_to_end(city)
+        return weather_data
+
+    def invalidate(self, city: Optional[str] = None):
+        if city is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(city, None)
+
+    async def get_or_fetch(self, city: str, fetch: Callable[[str], Awaitable[WeatherData]]) -> WeatherData:
+        weather_data = self.get(city)
+        if weather_data is not None:
+            self.hits += 1
+            return weather_data
+
+        task = self._inflight.get(city)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch(city, fetch))
+            self._inflight[city] = task
+        # Shielded so a client disconnect does not cancel the fetch other callers wait on
+        return await asyncio.shield(task)
+
+    async def _fetch(self, city: str, fetch: Callable[[str], Awaitable[WeatherData]]) -> WeatherData:
+        try:
+            weather_data = await fetch(city)
+            self.put(weather_data)
+            return weather_data
+        finally:
+            self._inflight.pop(city, None)
+
+    def split(self, cities: List[str]) -> Tuple[List[WeatherData], List[str]]:
+        # Returns the fresh cached readings and the cities that still need fetching
+        cached, missing = [], []
+        for city in cities:
+            weather_data = self.get(city)
+            if weather_data is not None:
+                self.hits += 1
+                cached.append(weather_data)
+            else:
+                self.misses += 1
+                missing.append(city)
+        return cached, missing
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "max_staleness_seconds": self.max_staleness,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "in_flight": len(self._inflight),
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+weather_cache = LatestWeatherCache(config.WEATHER_CACHE_MAX_STALENESS_SECONDS, config.WEATHER_CACHE_MAX_ENTRIES)
@@ -0,0 +1,68 @@
+from typing import Dict, List, NamedTuple, Optional, Set
+from app.collection_index import CollectionIndex
+from app.config import config
+from app.logger import main_logger as logger
+
+CITY_COLLECTION = "cities"
+
+class CityEntry(NamedTuple):
+    name: str
+    owm_id: Optional[int] = None  # OpenWeatherMap city ID, needed for /group batching
+    active: bool = True
+
+# The cities the app tracks, mirrored from the `cities` collection ({_id: name,
+# owm_id, active}). Model validators check names against it with a set lookup
+# of every known city, active or not: deactivating a city only stops polling it,
+# so its stored readings, thresholds and rules keep validating.
+# Until the collection has been loaded (or while it is empty) the cities from
+# config.CITY_IDS are used, so models validate the same way in scripts, the CLI
+# and tests as in the API.
+class CityRegistry(CollectionIndex):
+    name = "cities"
+
+    def __init__(self, refresh_interval: float, defaults: Dict[str, int]):
+        super().__init__(refresh_interval)
+        self.defaults = [CityEntry(name, owm_id) for name, owm_id in defaults.items()]
+        self._known: Set[str] = set()
+        self._names: List[str] = []
+        self._changed()
+
+    def _parse(self, doc: dict) -> CityEntry:
+        return CityEntry(doc["_id"], doc.get("owm_id"), doc.get("active", True))
+
+    def _key(self, city: CityEntry) -> str:
+        return city.name
+
+    def _changed(self):
+        entries = self._items.values() if self._items else self.defaults
+        self._names = sorted(city.name for city in entries if city.active)
+        self._known = {city.name for city in entries}
+        self._owm_ids = {city.name: city.owm_id for city in entries if city.owm_id is not None}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._known
+
+    def names(self) -> List[str]:
+        # Active cities only: the ones the ingestion cycle polls
+        return list(self._names)
+
+    def owm_id(self, name: str) -> Optional[int]:
+        return self._owm_ids.get(name)
+
+    def set(self, city: CityEntry):
+        if not self._items:
+            # Still on the defaults (registry not loaded): keep them alongside the new city
+            self._items = {default.name: default for default in self.defaults}
+        self._put(city)
+
+    async def seed(self, collection):
+        # Inserts the default cities the first time; existing documents are left alone
+        for city in self.defaults:
+            await collection.update_one(
+                {"_id": city.name},
+                {"$setOnInsert": {"owm_id": city.owm_id, "active": True}},
+                upsert=True
+            )
+        logger.info(f"Seeded {len(self.defaults)} default cities")
+
+city_registry = CityRegistry(config.THRESHOLD_REFRESH_SECONDS, config.CITY_IDS)
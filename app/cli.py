@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from app.tasks import calculate_daily_summary
+from app.cities import CITY_COLLECTION, city_registry
+from app.database import check_query_plans, ensure_indexes, get_db
+from app.rollups import refresh_rollups
+from app.retention import compact_readings
+
+# Maintenance commands, e.g.:
+#   python -m app.cli backfill-summaries --start 2024-10-01 --end 2024-10-07 --city Delhi
+#   python -m app.cli explain
+#   python -m app.cli compact
+
+async def backfill_summaries(start: str, end: str, selected_cities):
+    if not selected_cities:
+        await city_registry.load(get_db()[CITY_COLLECTION])
+        selected_cities = city_registry.names()
+    day = datetime.strptime(start, "%Y-%m-%d").date()
+    last = datetime.strptime(end, "%Y-%m-%d").date()
+    while day <= last:
+        for city in selected_cities:
+            await calculate_daily_summary(city, day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+    await refresh_rollups()
+
+async def explain_queries(create_indexes: bool) -> int:
+    if create_indexes:
+        await ensure_indexes(get_db())
+    plans = await check_query_plans(get_db())
+    for plan in plans:
+        flag = "COLLSCAN" if plan["collscan"] else "ok"
+        print(f"{flag:<9} {plan['query']:<28} {plan['collection']:<18} {' > '.join(plan['stages'])}")
+    return 1 if any(plan["collscan"] for plan in plans) else 0
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill = subparsers.add_parser("backfill-summaries", help="Recompute daily summaries from raw readings")
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    backfill.add_argument("--start", default=today, help="First date to rebuild (YYYY-MM-DD), defaults to today")
+    backfill.add_argument("--end", help="Last date to rebuild (YYYY-MM-DD), defaults to --start")
+    backfill.add_argument("--city", action="append", help="City to rebuild, may be repeated; defaults to all cities")
+
+    explain = subparsers.add_parser("explain", help="Explain each route's query and flag collection scans")
+    explain.add_argument("--create-indexes", action="store_true", help="Create the required indexes first")
+
+    subparsers.add_parser("compact", help="Compact raw readings into hourly aggregates up to the last full hour")
+
+    args = parser.parse_args()
+    if args.command == "backfill-summaries":
+        asyncio.run(backfill_summaries(args.start, args.end or args.start, args.city))
+    elif args.command == "explain":
+        raise SystemExit(asyncio.run(explain_queries(args.create_indexes)))
+    elif args.command == "compact":
+        asyncio.run(compact_readings())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from app.logger import main_logger as logger
+from app.resilience import backoff_delay
+
+WATCH_RETRY_BASE_SECONDS = 1.0
+
+# In-process mirror of a small, rarely-changing config collection, so evaluating
+# a reading needs no database round-trip. It is loaded at startup, updated
+# directly by the API routes that write the collection, and kept in sync with
+# writes from other workers through a change stream, or by periodic reloads
+# where change streams are unavailable (standalone mongod). `version` is bumped
+# on every change so consumers can tell when to rebuild derived state. A
+# document that fails to parse is logged and skipped, so one bad document can
+# never empty the index or stop the watcher.
+class CollectionIndex(ABC):
+    name = "documents"
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._items: Dict[str, object] = {}
+        self._collection = None
+        self._task: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    def _parse(self, doc: dict):
+        pass
+
+    @abstractmethod
+    def _key(self, item) -> str:
+        pass
+
+    def all(self) -> List:
+        return list(self._items.values())
+
+    def _changed(self):
+        # Hook for subclasses maintaining derived lookups; called after every change
+        pass
+
+    def _put(self, item):
+        self._items[self._key(item)] = item
+        self.version += 1
+        self._changed()
+
+    def remove(self, key: str):
+        if self._items.pop(key, None) is not None:
+            self.version += 1
+            self._changed()
+
+    async def load(self, collection=None):
+        if collection is not None:
+            self._collection = collection
+        items = {}
+        skipped = 0
+        async for doc in self._collection.find():
+            item = self._parse_or_skip(doc)
+            if item is None:
+                skipped += 1
+                continue
+            items[self._key(item)] = item
+        self._items = items
+        self.version += 1
+        self._changed()
+        logger.info(f"Loaded {len(items)} {self.name}" + (f" ({skipped} invalid skipped)" if skipped else ""))
+
+    def _parse_or_skip(self, doc: dict):
+        try:
+            return self._parse(doc)
+        except Exception as e:
+            logger.error(f"Skipping invalid document {doc.get('_id')} in {self.name}: {str(e)}")
+            return None
+
+    async def start(self, collection):
+        self._collection = collection
+        try:
+            await self.load()
+        except Exception as e:
+            # The watcher below keeps retrying, so startup can proceed
+            logger.error(f"Error loading {self.name}: {str(e)}", exc_info=True)
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        # Reloads once the stream is open, so a failed initial load and any
+        # changes missed while the stream was down are picked up. When the
+        # stream fails (a network error, or a standalone server without change
+        # streams) the index is reloaded while waiting to reopen it, with
+        # jittered backoff capped at the refresh interval; on a standalone server
+        # this amounts to polling at intervals of up to refresh_interval seconds.
+        attempt = 0
+        while True:
+            try:
+                async with self._collection.watch(full_document="updateLookup") as stream:
+                    await self.load()
+                    logger.info(f"Watching {self.name} change stream")
+                    attempt = 0
+                    async for change in stream:
+                        document = change.get("fullDocument")
+                        if document is not None:
+                            item = self._parse_or_skip(document)
+                            if item is not None:
+                                self._put(item)
+                        else:
+                            # Deletes only carry the _id, so rebuild from scratch
+                            await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == 0:
+                    logger.info(f"Change stream on {self.name} unavailable ({str(e)}), reloading until it reopens")
+            await asyncio.sleep(backoff_delay(attempt, WATCH_RETRY_BASE_SECONDS, self.refresh_interval))
+            attempt = min(attempt + 1, 16)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Error reloading {self.name}: {str(e)}", exc_info=True)
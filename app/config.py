@@ -6,10 +6,104 @@ load_dotenv()
 
 class Config:
     OPENWEATHERMAP_API_KEY = os.getenv("OPENWEATHERMAP_API_KEY")
+    OPENWEATHERMAP_BASE_URL = os.getenv("OPENWEATHERMAP_BASE_URL", "http://api.openweathermap.org/data/2.5")
     MONGO_URI = os.getenv("MONGO_URI")
+    MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "weather_app")
     WEATHER_COLLECTION = "weather_data"
+    WEATHER_TIMESERIES_GRANULARITY = os.getenv("WEATHER_TIMESERIES_GRANULARITY", "minutes")
+    HISTORY_DEFAULT_DAYS = int(os.getenv("HISTORY_DEFAULT_DAYS", "7"))
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
     CORS_METHODS = os.getenv("CORS_METHODS", "GET,POST,PUT,DELETE").split(",")
     CORS_HEADERS = os.getenv("CORS_HEADERS", "*").split(",")
+    DEBUG_ENDPOINTS_ENABLED = os.getenv("DEBUG_ENDPOINTS_ENABLED", "false").lower() == "true"
+
+    # Logging: levels per logger as "name=LEVEL,..."; INFO lines are sampled per call site
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "httpx=WARNING")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLE_WINDOW_SECONDS = float(os.getenv("LOG_SAMPLE_WINDOW_SECONDS", "60"))
+    LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "20"))
+
+    # Shared Mongo client and connection pool
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+    MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+
+    # Shared upstream HTTP client
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+    # Upstream resilience: per-call deadline, retries and circuit breaker
+    UPSTREAM_DEADLINE_SECONDS = float(os.getenv("UPSTREAM_DEADLINE_SECONDS", "15"))
+    UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+    UPSTREAM_BACKOFF_BASE_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_BASE_SECONDS", "0.2"))
+    UPSTREAM_BACKOFF_MAX_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_MAX_SECONDS", "2"))
+    RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+    RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1"))
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+    # Ingestion cycle
+    FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "10"))
+    USE_GROUP_ENDPOINT = os.getenv("USE_GROUP_ENDPOINT", "true").lower() == "true"
+    GROUP_BATCH_SIZE = min(int(os.getenv("GROUP_BATCH_SIZE", "20")), 20)  # OpenWeatherMap caps /group at 20 IDs
+
+    # Latest-weather cache
+    WEATHER_CACHE_MAX_STALENESS_SECONDS = float(os.getenv("WEATHER_CACHE_MAX_STALENESS_SECONDS", "600"))
+    WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "1000"))
+
+    # Read-endpoint response cache
+    RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "500"))
+
+    # Alert threshold index (polling fallback when change streams are unavailable)
+    THRESHOLD_REFRESH_SECONDS = float(os.getenv("THRESHOLD_REFRESH_SECONDS", "60"))
+
+    # Buffered notification/alert writes
+    NOTIFICATION_FLUSH_SIZE = int(os.getenv("NOTIFICATION_FLUSH_SIZE", "100"))
+    NOTIFICATION_FLUSH_INTERVAL_SECONDS = float(os.getenv("NOTIFICATION_FLUSH_INTERVAL_SECONDS", "1"))
+    NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000"))
+    NOTIFICATION_COOLDOWN_SECONDS = float(os.getenv("NOTIFICATION_COOLDOWN_SECONDS", "3600"))
+    NOTIFICATION_COOLDOWN_MAX_KEYS = int(os.getenv("NOTIFICATION_COOLDOWN_MAX_KEYS", "1000000"))
+
+    # Periodic scheduler
+    POLL_INTERVAL_SECONDS = float(os.getenv("POLL_INTERVAL_SECONDS", "300"))
+    POLL_JITTER_SECONDS = float(os.getenv("POLL_JITTER_SECONDS", "10"))
+    LEADER_LOCK_ENABLED = os.getenv("LEADER_LOCK_ENABLED", "true").lower() == "true"
+    LEADER_LOCK_TTL_SECONDS = float(os.getenv("LEADER_LOCK_TTL_SECONDS", str(3 * POLL_INTERVAL_SECONDS)))
+
+    # Retention in days (0 keeps data forever). Raw readings are compacted into
+    # hourly aggregates every COMPACTION_INTERVAL_SECONDS before they expire.
+    RAW_RETENTION_DAYS = int(os.getenv("RAW_RETENTION_DAYS", "30"))
+    HOURLY_RETENTION_DAYS = int(os.getenv("HOURLY_RETENTION_DAYS", "730"))
+    READ_NOTIFICATION_TTL_DAYS = int(os.getenv("READ_NOTIFICATION_TTL_DAYS", "30"))
+    NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "180"))
+    ALERT_RETENTION_DAYS = int(os.getenv("ALERT_RETENTION_DAYS", "180"))
+    COMPACTION_INTERVAL_SECONDS = float(os.getenv("COMPACTION_INTERVAL_SECONDS", "3600"))
+
+    # Sharded ingestion: each worker polls the cities of the shards it leases
+    INGESTION_SHARDED = os.getenv("INGESTION_SHARDED", "false").lower() == "true"
+    INGESTION_SHARD_COUNT = int(os.getenv("INGESTION_SHARD_COUNT", "64"))
+    INGESTION_LEASE_TTL_SECONDS = float(os.getenv("INGESTION_LEASE_TTL_SECONDS", str(3 * POLL_INTERVAL_SECONDS)))
+
+    # Cities seeded into the `cities` registry on first start, with the
+    # OpenWeatherMap city IDs used by the /group endpoint
+    CITY_IDS = {
+        "Delhi": 1273294,
+        "Mumbai": 1275339,
+        "Chennai": 1264527,
+        "Bangalore": 1277333,
+        "Kolkata": 1275004,
+        "Hyderabad": 1269843,
+    }
 
 config = Config()
@@ -0,0 +1,252 @@
+import threading
+from datetime import datetime
+from bson import ObjectId
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure
+from pymongo.monitoring import ConnectionPoolListener
+from app.config import config
+from app.logger import main_logger as logger
+from app.metrics import mongo_command_metrics
+
+# Connection-pool gauges, fed by pymongo's CMAP events. Events arrive on driver
+# threads, hence the lock.
+class PoolStats(ConnectionPoolListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_checkout_wait_ms": 1000 * self.total_wait_seconds / self.checkouts if self.checkouts else 0.0,
+                "max_checkout_wait_ms": 1000 * self.max_wait_seconds,
+                "max_pool_size": config.MONGO_MAX_POOL_SIZE,
+            }
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.checkouts += 1
+            self.total_wait_seconds += event.duration
+            self.max_wait_seconds = max(self.max_wait_seconds, event.duration)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+pool_stats = PoolStats()
+
+_client: Optional[AsyncIOMotorClient] = None
+
+def get_client() -> AsyncIOMotorClient:
+    # One client (and so one connection pool) per process, shared by routes, services and tasks
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            config.MONGO_URI,
+            maxPoolSize=config.MONGO_MAX_POOL_SIZE,
+            minPoolSize=config.MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=config.MONGO_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            serverSelectionTimeoutMS=config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=config.MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=config.MONGO_SOCKET_TIMEOUT_MS,
+            readPreference=config.MONGO_READ_PREFERENCE,
+            event_listeners=[pool_stats, mongo_command_metrics],
+        )
+    return _client
+
+def get_db() -> AsyncIOMotorDatabase:
+    # Also used as a FastAPI dependency: `db = Depends(get_db)`
+    return get_client()[config.MONGO_DB_NAME]
+
+def close_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+async def ensure_collections(db):
+    # Raw readings are append-only and scanned by time range, so they live in a
+    # time-series collection bucketed per city (metaField) and timestamp.
+    name = config.WEATHER_COLLECTION
+    existing = await db.list_collections(filter={"name": name}).to_list(length=1)
+    if existing:
+        if existing[0].get("type") != "timeseries":
+            logger.warning(
+                f"Collection '{name}' exists but is not a time-series collection; "
+                f"readings will still be appended, but migrate it for efficient range scans"
+            )
+        return
+
+    try:
+        await db.create_collection(
+            name,
+            timeseries={
+                "timeField": "timestamp",
+                "metaField": "city",
+                "granularity": config.WEATHER_TIMESERIES_GRANULARITY,
+            },
+        )
+        logger.info(f"Created time-series collection '{name}'")
+    except CollectionInvalid:
+        # Another worker created it concurrently
+        pass
+
+# Indexes backing the queries in routes.py and tasks.py, keyed by collection
+INDEXES = {
+    config.WEATHER_COLLECTION: [
+        ([("city", ASCENDING), ("timestamp", DESCENDING)], {}),
+    ],
+    "weather_hourly": [
+        ([("city", ASCENDING), ("timestamp", DESCENDING)], {"unique": True}),
+    ],
+    "daily_summaries": [
+        ([("city", ASCENDING), ("date", ASCENDING)], {"unique": True}),
+        ([("date", ASCENDING)], {}),
+        # Days whose rollups are due a refresh (see app/rollups.py)
+        ([("rollup_pending", ASCENDING)], {"partialFilterExpression": {"rollup_pending": {"$exists": True}}}),
+    ],
+    "summary_rollups": [
+        ([("city", ASCENDING), ("period", ASCENDING), ("period_start", ASCENDING)], {"unique": True}),
+        ([("period", ASCENDING), ("period_start", ASCENDING)], {}),
+    ],
+    "alert_thresholds": [
+        ([("city", ASCENDING)], {"unique": True}),
+    ],
+    "alert_rules": [
+        ([("city", ASCENDING), ("subscriber", ASCENDING)], {}),
+    ],
+    # Keyset pagination sorts on (timestamp, _id), so _id is part of these keys
+    "notifications": [
+        ([("timestamp", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("city", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("city", ASCENDING), ("is_read", ASCENDING), ("timestamp", DESCENDING)], {}),
+    ],
+    "weather_alerts": [
+        ([("city", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)], {}),
+    ],
+    # Lease documents for sharded ingestion; expired ones are garbage-collected
+    "ingestion_workers": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "ingestion_shards": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+}
+
+async def ensure_indexes(db):
+    for collection_name, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                name = await db[collection_name].create_index(keys, **options)
+                logger.info(f"Ensured index {collection_name}.{name}")
+            except OperationFailure as e:
+                # e.g. duplicate (city, date) summaries left over from before the unique index
+                logger.error(f"Could not create index {keys} on {collection_name}: {str(e)}")
+
+# Representative queries issued by the routes, used to verify the plans above
+QUERY_PLANS = [
+    ("weather_history", config.WEATHER_COLLECTION,
+     {"city": "Delhi", "timestamp": {"$gte": datetime(2000, 1, 1)}}, [("timestamp", DESCENDING)]),
+    ("weather_history_hourly", "weather_hourly",
+     {"city": "Delhi", "timestamp": {"$gte": datetime(2000, 1, 1), "$lt": datetime(2000, 2, 1)}}, [("timestamp", DESCENDING)]),
+    ("summaries_by_city", "daily_summaries",
+     {"city": "Delhi", "date": {"$gte": "2000-01-01"}}, [("date", DESCENDING)]),
+    ("summaries_by_date", "daily_summaries", {"date": "2000-01-01"}, None),
+    ("compare_daily", "daily_summaries",
+     {"city": {"$in": ["Delhi", "Mumbai"]}, "date": {"$gte": "2000-01-01"}}, [("date", ASCENDING)]),
+    ("compare_rollups", "summary_rollups",
+     {"period": "week", "city": {"$in": ["Delhi", "Mumbai"]}, "period_start": {"$gte": "2000-01-01"}},
+     [("period_start", ASCENDING)]),
+    ("alert_threshold", "alert_thresholds", {"city": "Delhi"}, None),
+    ("weather_alerts", "weather_alerts", {"city": "Delhi"}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("notifications", "notifications", {}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("city_notifications", "notifications", {"city": "Delhi"}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("city_notifications_page", "notifications",
+     {"city": "Delhi", "$or": [{"timestamp": {"$lt": datetime(2000, 1, 1)}},
+                               {"timestamp": datetime(2000, 1, 1), "_id": {"$lt": ObjectId("0" * 24)}}]},
+     [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("unread_city_notifications", "notifications", {"city": "Delhi", "is_read": False}, [("timestamp", DESCENDING)]),
+]
+
+def _plan_stages(node, in_winning_plan: bool = False) -> List[str]:
+    # Collects stage names from every winningPlan in the explain output. Time-series
+    # queries are rewritten into an aggregation over the buckets collection, so the
+    # winning plan may be nested inside a pipeline stage rather than at the top level.
+    stages = []
+    if isinstance(node, dict):
+        if in_winning_plan and "stage" in node:
+            stages.append(node["stage"])
+        for key, value in node.items():
+            if key == "rejectedPlans":
+                continue
+            stages.extend(_plan_stages(value, in_winning_plan or key == "winningPlan"))
+    elif isinstance(node, list):
+        for item in node:
+            stages.extend(_plan_stages(item, in_winning_plan))
+    return stages
+
+async def check_query_plans(db) -> List[dict]:
+    results = []
+    for name, collection_name, query, sort in QUERY_PLANS:
+        cursor = db[collection_name].find(query).limit(10)
+        if sort:
+            cursor = cursor.sort(sort)
+        stages = _plan_stages(await cursor.explain())
+        collscan = "COLLSCAN" in stages
+        if collscan:
+            logger.warning(f"Query '{name}' on {collection_name} uses a collection scan")
+        results.append({
+            "query": name,
+            "collection": collection_name,
+            "stages": stages,
+            "collscan": collscan,
+        })
+    return results
@@ -1,29 +1,168 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Tuple
 import os
+from app.config import config
 
-def setup_logger(name, log_file, level=logging.INFO):
-    formatter = logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s')
+# Logging never touches disk or the console on the event loop. Every logger
+# propagates to a single QueueHandler on the root logger, which only renders the
+# message and enqueues the record (dropping it, and counting the drop, if the
+# queue is full). A QueueListener thread formats records as JSON lines and writes
+# them to the console and to the rotating file of their logger.
 
-    handler = RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5)
-    handler.setFormatter(formatter)
+# OpenWeatherMap URLs carry the API key as a query parameter (httpx logs them)
+_SECRET_PARAMS = re.compile(r"(appid=)[^&\s\"']+")
 
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-    logger.addHandler(handler)
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": _SECRET_PARAMS.sub(r"\1***", record.getMessage()),
+        }
+        if getattr(record, "sampled_out", 0):
+            entry["sampled_out"] = record.sampled_out
+        if record.exc_text:
+            entry["exc"] = _SECRET_PARAMS.sub(r"\1***", record.exc_text)
+        return json.dumps(entry, default=str)
 
-    # Also log to console
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+# Lets through the first `burst` INFO-or-lower records per call site (file and
+# line: most modules share one logger) in each `window` seconds and drops the
+# rest; the next record let through from that call site reports how many were
+# dropped. Warnings and errors are never sampled.
+class SamplingFilter(logging.Filter):
+    def __init__(self, window: float, burst: int):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self._sites: Dict[Tuple[str, int], list] = {}
 
-    return logger
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.burst <= 0:
+            return True
+        now = time.monotonic()
+        site = self._sites.get((record.pathname, record.lineno))
+        if site is None or now - site[0] >= self.window:
+            # [window start, records passed, records dropped]
+            dropped = site[2] if site is not None else 0
+            site = self._sites[(record.pathname, record.lineno)] = [now, 0, dropped]
+        if site[1] >= self.burst:
+            site[2] += 1
+            return False
+        site[1] += 1
+        record.sampled_out, site[2] = site[2], 0
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only the cheap part happens on the caller's thread: render the message
+        # (args may be mutable) and the traceback (frames move on); formatting
+        # into JSON is left to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+# Writes each record to the rotating file of its logger (main.log for any logger
+# without a file of its own)
+class FileRouter(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self._files: Dict[str, RotatingFileHandler] = {}
+
+    def add(self, name: str, log_file: str):
+        handler = RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5)
+        handler.setFormatter(JsonFormatter())
+        self._files[name] = handler
+
+    def emit(self, record: logging.LogRecord):
+        handler = self._files.get(record.name) or self._files.get("main")
+        if handler is not None:
+            handler.handle(record)
+
+    def close(self):
+        for handler in self._files.values():
+            handler.close()
+        super().close()
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    # "api=WARNING,httpx=WARNING" -> {"api": "WARNING", "httpx": "WARNING"}
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
 
 # Ensure log directory exists
 os.makedirs('logs', exist_ok=True)
 
+_queue: queue.Queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(_queue)
+queue_handler.addFilter(SamplingFilter(config.LOG_SAMPLE_WINDOW_SECONDS, config.LOG_SAMPLE_BURST))
+
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(JsonFormatter())
+_file_router = FileRouter()
+_listener = QueueListener(_queue, _console_handler, _file_router, respect_handler_level=True)
+_listener_lock = threading.Lock()
+_listener_running = False
+
+def setup_logger(name, log_file, level=None):
+    _file_router.add(name, log_file)
+    logger = logging.getLogger(name)
+    if level is not None:
+        logger.setLevel(level)
+    return logger
+
+def configure_logging():
+    global _listener_running
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(config.LOG_LEVEL)
+    for name, level in _parse_levels(config.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+    with _listener_lock:
+        if not _listener_running:
+            _listener.start()
+            _listener_running = True
+
+def stop_logging():
+    # Flushes whatever is still queued; registered with atexit
+    global _listener_running
+    with _listener_lock:
+        if _listener_running:
+            _listener.stop()
+            _listener_running = False
+    _file_router.close()
+
+def log_stats() -> dict:
+    return {"queued": _queue.qsize(), "dropped": queue_handler.dropped}
+
 # Create loggers
 main_logger = setup_logger('main', 'logs/main.log')
 api_logger = setup_logger('api', 'logs/api.log')
 weather_logger = setup_logger('weather', 'logs/weather.log')
 
+configure_logging()
+atexit.register(stop_logging)
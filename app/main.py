@@ -1,16 +1,28 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import router
 from dotenv import load_dotenv
+from typing import Optional
 from app.tasks import start_weather_monitoring
-from app.logger import main_logger as logger
-import asyncio
+from app.scheduler import PeriodicScheduler, LeaderLock
+from app.sharding import ShardCoordinator
+from app.cities import CITY_COLLECTION, city_registry
+from app.database import ensure_collections, ensure_indexes, get_db, close_client, pool_stats
+from app.retention import compact_readings, ensure_retention
+from app.services import close_http_client, upstream_stats
+from app.thresholds import threshold_index, rule_index
+from app.notifications import notification_writer, alert_writer
+from app.logger import main_logger as logger, log_stats
 from app.config import config
+from app.metrics import RequestMetricsMiddleware, register_stats
+from app.cache import weather_cache
+from app.response_cache import response_cache
+from app.alerts import alert_engine
 
 load_dotenv()  # This line loads the variables from .env
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -21,16 +33,90 @@ app.add_middleware(
     allow_headers=config.CORS_HEADERS,
 )
 
+app.add_middleware(RequestMetricsMiddleware)
+
 app.include_router(router)
 
+register_stats("weather_cache", weather_cache.stats)
+register_stats("response_cache", response_cache.stats)
+register_stats("mongo_pool", pool_stats.snapshot)
+register_stats("alert_engine", alert_engine.stats)
+register_stats("notification_writer", notification_writer.stats)
+register_stats("alert_writer", alert_writer.stats)
+register_stats("upstream", upstream_stats)
+register_stats("logging", log_stats)
+
+# Built in startup_event, so a restarted lifespan binds them to the current client
+coordinator: Optional[ShardCoordinator] = None
+
+def _leader_lock(name: str, ttl_seconds: float) -> Optional[LeaderLock]:
+    return LeaderLock(get_db()["scheduler_locks"], name, ttl_seconds) if config.LEADER_LOCK_ENABLED else None
+
+async def run_ingestion_cycle():
+    if coordinator is None:
+        await start_weather_monitoring()
+        return
+    await coordinator.claim()
+    await start_weather_monitoring(coordinator.select(city_registry.names()))
+
+scheduler = PeriodicScheduler(
+    "weather_monitoring",
+    run_ingestion_cycle,
+    interval=config.POLL_INTERVAL_SECONDS,
+    jitter=config.POLL_JITTER_SECONDS,
+)
+
+compaction_scheduler = PeriodicScheduler(
+    "weather_compaction",
+    compact_readings,
+    interval=config.COMPACTION_INTERVAL_SECONDS,
+    jitter=config.POLL_JITTER_SECONDS,
+)
+
 @app.on_event("startup")
 async def startup_event():
+    global coordinator
     logger.info("Application starting up")
-    asyncio.create_task(start_weather_monitoring())
+    try:
+        await ensure_collections(get_db())
+        await ensure_indexes(get_db())
+        await ensure_retention(get_db())
+        await city_registry.seed(get_db()[CITY_COLLECTION])
+    except Exception as e:
+        logger.error(f"Error preparing database collections: {str(e)}", exc_info=True)
+    await city_registry.start(get_db()[CITY_COLLECTION])
+    await threshold_index.start(get_db()["alert_thresholds"])
+    await rule_index.start(get_db()["alert_rules"])
+    notification_writer.start()
+    alert_writer.start()
+    if config.INGESTION_SHARDED:
+        # Every worker ingests the cities of the shards it holds, so no leader lock
+        coordinator = ShardCoordinator(get_db(), config.INGESTION_SHARD_COUNT, config.INGESTION_LEASE_TTL_SECONDS)
+        scheduler.lock = None
+    else:
+        coordinator = None
+        scheduler.lock = _leader_lock("weather_monitoring", config.LEADER_LOCK_TTL_SECONDS)
+    compaction_scheduler.lock = _leader_lock("weather_compaction", 3 * config.COMPACTION_INTERVAL_SECONDS)
+    scheduler.start()
+    compaction_scheduler.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down")
+    await scheduler.stop()
+    await compaction_scheduler.stop()
+    if coordinator is not None:
+        try:
+            await coordinator.leave()
+        except Exception as e:
+            logger.error(f"Error releasing ingestion shards: {str(e)}", exc_info=True)
+    await city_registry.stop()
+    await threshold_index.stop()
+    await rule_index.stop()
+    await notification_writer.stop()
+    await alert_writer.stop()
+    await close_http_client()
+    close_client()
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
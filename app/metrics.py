@@ -0,0 +1,165 @@
+import functools
+import threading
+import time
+from typing import Callable, Dict, Tuple
+from fastapi import HTTPException
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+from pymongo.monitoring import CommandListener
+from app.cities import city_registry
+
+# Prometheus metrics, exposed by the /metrics route. Latencies are histograms in
+# seconds; everything else the app already counts in its stats() methods is
+# exported as gauges through register_stats() rather than counted twice.
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "API request latency by route template",
+    ["method", "route", "status"])
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds", "OpenWeatherMap request latency per attempt",
+    ["endpoint", "outcome"])
+UPSTREAM_FETCH_DURATION = Histogram(
+    "upstream_fetch_duration_seconds", "Latency of fetching one city's weather, retries included",
+    ["city"])
+UPSTREAM_FETCH_ERRORS = Counter(
+    "upstream_fetch_errors_total", "Failed weather fetches by city and resulting status",
+    ["city", "status"])
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection",
+    ["collection", "command", "outcome"])
+OPERATION_DURATION = Histogram(
+    "operation_duration_seconds", "Latency of instrumented service and task functions",
+    ["operation", "outcome"])
+CYCLE_DURATION = Histogram(
+    "ingestion_cycle_duration_seconds", "Duration of one weather monitoring cycle",
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300))
+READINGS_EVALUATED = Counter(
+    "alert_readings_evaluated_total", "Readings evaluated against the alert rules")
+RULES_FIRED = Counter(
+    "alert_rules_fired_total", "Alert rules that fired, before the notification cooldown")
+ALERTS_EMITTED = Counter(
+    "alerts_emitted_total", "Alerts written after the cooldown, one per city and subscriber")
+
+def timed(operation: str):
+    # Records the duration of an async function under `operation`, without touching its call sites
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                OPERATION_DURATION.labels(operation, outcome).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+def city_label(city: str) -> str:
+    # The city comes from the request path, so only registered cities get their
+    # own series; anything else shares "other" to keep the label set bounded
+    return city if city in city_registry else "other"
+
+def timed_fetch(func):
+    # Per-city latency and errors for fetch_weather_data(city)
+    @functools.wraps(func)
+    async def wrapper(city: str, *args, **kwargs):
+        started = time.perf_counter()
+        label = city_label(city)
+        try:
+            return await func(city, *args, **kwargs)
+        except HTTPException as e:
+            UPSTREAM_FETCH_ERRORS.labels(label, str(e.status_code)).inc()
+            raise
+        except Exception:
+            UPSTREAM_FETCH_ERRORS.labels(label, "error").inc()
+            raise
+        finally:
+            UPSTREAM_FETCH_DURATION.labels(label).observe(time.perf_counter() - started)
+    return wrapper
+
+class RequestMetricsMiddleware:
+    # Plain ASGI middleware, so streaming responses are timed to their last chunk.
+    # Requests are labelled by route template (/weather/{city}), never the raw path.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - started)
+
+# Command timings from the driver's command monitoring events. The collection is
+# only named in the started event, so it is remembered per request id until the
+# matching succeeded/failed event arrives (on a driver thread, hence the lock).
+class MongoCommandMetrics(CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[object, int], str] = {}
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        else:
+            collection = event.command.get(event.command_name)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else "-"
+
+    def _finished(self, event, outcome: str):
+        with self._lock:
+            collection = self._pending.pop((event.connection_id, event.request_id), "-")
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name, outcome).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event):
+        self._finished(event, "ok")
+
+    def failed(self, event):
+        self._finished(event, "error")
+
+mongo_command_metrics = MongoCommandMetrics()
+
+# Exports the numeric fields of existing stats() dicts (caches, pool, writers...)
+# as gauges named <source>_<field>, read at scrape time
+class StatsCollector:
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], dict]] = {}
+
+    def register(self, name: str, stats: Callable[[], dict]):
+        self._sources[name] = stats
+
+    def collect(self):
+        for name, stats in self._sources.items():
+            yield from self._gauges(name, stats())
+
+    def _gauges(self, prefix: str, stats: dict):
+        for field, value in stats.items():
+            if isinstance(value, dict):
+                yield from self._gauges(f"{prefix}_{field}", value)
+            elif isinstance(value, (int, float)):
+                gauge = GaugeMetricFamily(f"{prefix}_{field}", f"{field} from {prefix} stats")
+                gauge.add_metric([], float(value))
+                yield gauge
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+def register_stats(name: str, stats: Callable[[], dict]):
+    stats_collector.register(name, stats)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Optional, List, Literal
 from datetime import datetime
+from app.cities import city_registry
 
 class WeatherData(BaseModel):
     city: str = Field(..., min_length=1, max_length=100)
@@ -12,11 +13,15 @@ class WeatherData(BaseModel):
     @field_validator('city')
     @classmethod
     def city_must_be_valid(cls, v):
-        valid_cities = ["Delhi", "Mumbai", "Chennai", "Bangalore", "Kolkata", "Hyderabad"]
-        if v not in valid_cities:
-            raise ValueError(f"City must be one of {valid_cities}")
+        if v not in city_registry:
+            raise ValueError(f"Unknown city: {v}")
         return v
 
+class City(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    owm_id: Optional[int] = Field(None, ge=1)  # Required for /group batching
+    active: bool = True
+
 class DailySummary(BaseModel):
     date: str  # Format: YYYY-MM-DD
     city: str
@@ -39,9 +44,8 @@ class AlertThreshold(BaseModel):
     @field_validator('city')
     @classmethod
     def city_must_be_valid(cls, v):
-        valid_cities = ["Delhi", "Mumbai", "Chennai", "Bangalore", "Kolkata", "Hyderabad"]
-        if v not in valid_cities:
-            raise ValueError(f"City must be one of {valid_cities}")
+        if v not in city_registry:
+            raise ValueError(f"Unknown city: {v}")
         return v
 
     @field_validator('max_temp', 'min_temp')
@@ -52,8 +56,43 @@ class AlertThreshold(BaseModel):
                 raise ValueError("max_temp must be greater than min_temp")
         return v
 
+class AlertRule(BaseModel):
+    # A single user-defined predicate on one city's readings. Numeric rules
+    # compare `metric` against `value`; condition rules match `weather_condition`.
+    # The rule fires once `consecutive_readings` readings in a row match.
+    id: Optional[str] = None
+    city: str = Field(..., min_length=1, max_length=100)
+    subscriber: Optional[str] = Field(None, min_length=1, max_length=100)
+    metric: Literal["temp", "feels_like", "condition"]
+    operator: Literal["gt", "lt", "eq"] = "gt"
+    value: Optional[float] = Field(None, ge=-100, le=100)
+    weather_condition: Optional[str] = Field(None, min_length=1, max_length=50)
+    consecutive_readings: int = Field(1, ge=1, le=1000)
+
+    @field_validator('city')
+    @classmethod
+    def city_must_be_valid(cls, v):
+        if v not in city_registry:
+            raise ValueError(f"Unknown city: {v}")
+        return v
+
+    @model_validator(mode='after')
+    def check_rule_shape(self):
+        if self.metric == "condition":
+            if self.weather_condition is None:
+                raise ValueError("condition rules require weather_condition")
+            self.operator = "eq"
+        else:
+            if self.value is None:
+                raise ValueError(f"{self.metric} rules require value")
+            if self.operator not in ("gt", "lt"):
+                raise ValueError(f"{self.metric} rules support the gt and lt operators")
+        return self
+
 class WeatherAlert(BaseModel):
+    id: Optional[str] = None
     city: str
+    subscriber: Optional[str] = None
     alerts: List[str]
     timestamp: datetime
 
@@ -63,11 +102,22 @@ class Notification(BaseModel):
     message: str = Field(..., min_length=1, max_length=500)
     timestamp: datetime
     is_read: bool = False
+    read_at: Optional[datetime] = None  # Read notifications expire READ_NOTIFICATION_TTL_DAYS after this
+    subscriber: Optional[str] = None
     weather_data: WeatherData
 
 class PaginationParams(BaseModel):
     limit: int = Field(10, ge=1, le=100)
-    offset: int = Field(0, ge=0)
+    offset: int = Field(0, ge=0)  # Deprecated: ignored when `after` is given
+    after: Optional[str] = None  # Opaque cursor from a previous page's next_cursor
+
+class NotificationPage(BaseModel):
+    notifications: List[Notification]
+    next_cursor: Optional[str] = None
+
+class WeatherAlertPage(BaseModel):
+    alerts: List[WeatherAlert]
+    next_cursor: Optional[str] = None
 
 class DateRange(BaseModel):
     start_date: Optional[datetime] = None
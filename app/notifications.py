@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from pymongo.errors import BulkWriteError
+from app.config import config
+from app.database import get_db
+from app.logger import main_logger as logger
+
+# Queued by stop() to make _run flush its batch and return
+_STOP = object()
+
+# Buffers documents bound for one collection and writes them with
+# insert_many(ordered=False) once flush_size documents are queued or
+# flush_interval seconds have passed. Producers never wait on Mongo: submit()
+# only enqueues, and when the bounded queue is full because Mongo is slow the
+# document is shed and counted instead of blocking the ingestion loop.
+class BufferedWriter:
+    def __init__(self, collection_name: str, flush_size: int, flush_interval: float, max_queue: int):
+        self.collection_name = collection_name
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, doc: dict) -> bool:
+        try:
+            self._queue.put_nowait(doc)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"{self.collection_name} write queue is full, dropping documents ({self.dropped} dropped so far)")
+            return False
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # Asks _run to write the batch it holds and return, rather than
+        # cancelling it and losing that batch
+        if self._task is not None:
+            if not self._task.done():
+                await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+        # Write whatever was submitted after the stop was requested
+        while not self._queue.empty():
+            await self._flush([doc for doc in self._drain(self._queue.qsize()) if doc is not _STOP])
+
+    def _drain(self, limit: int) -> List[dict]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                batch.extend(self._drain(self.flush_size - len(batch)))
+                remaining = deadline - asyncio.get_running_loop().time()
+                if len(batch) >= self.flush_size or remaining <= 0 or _STOP in batch:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [doc for doc in batch if doc is not _STOP]
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[dict]):
+        if not batch:
+            return
+        try:
+            result = await get_db()[self.collection_name].insert_many(batch, ordered=False)
+            self.written += len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            self.written += inserted
+            self.failed += len(batch) - inserted
+            logger.error(f"Partial failure writing {len(batch)} documents to {self.collection_name}: {e.details.get('writeErrors', [])[:1]}")
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Error writing {len(batch)} documents to {self.collection_name}: {str(e)}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+# Suppresses repeats of the same (city, rule) alert within the cooldown window.
+# Keys are kept in send order, so expired ones are evicted from the front in
+# amortized O(1) per alert; past max_keys the oldest live keys are evicted too.
+class AlertCooldown:
+    def __init__(self, cooldown: float, max_keys: int):
+        self.cooldown = cooldown
+        self.max_keys = max_keys
+        self._last_sent: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.suppressed = 0
+        self.evicted = 0
+
+    def allow(self, city: str, rule_id: str) -> bool:
+        now = time.monotonic()
+        key = (city, rule_id)
+        last_sent = self._last_sent.get(key)
+        if last_sent is not None and now - last_sent < self.cooldown:
+            self.suppressed += 1
+            return False
+        self._last_sent[key] = now
+        self._last_sent.move_to_end(key)
+        self._prune(now)
+        return True
+
+    def _prune(self, now: float):
+        while self._last_sent:
+            sent = next(iter(self._last_sent.values()))
+            if now - sent < self.cooldown and len(self._last_sent) <= self.max_keys:
+                break
+            if now - sent < self.cooldown:
+                self.evicted += 1
+            self._last_sent.popitem(last=False)
+
+notification_writer = BufferedWriter(
+    "notifications",
+    config.NOTIFICATION_FLUSH_SIZE,
+    config.NOTIFICATION_FLUSH_INTERVAL_SECONDS,
+    config.NOTIFICATION_QUEUE_SIZE,
+)
+alert_writer = BufferedWriter(
+    "weather_alerts",
+    config.NOTIFICATION_FLUSH_SIZE,
+    config.NOTIFICATION_FLUSH_INTERVAL_SECONDS,
+    config.NOTIFICATION_QUEUE_SIZE,
+)
+alert_cooldown = AlertCooldown(config.NOTIFICATION_COOLDOWN_SECONDS, config.NOTIFICATION_COOLDOWN_MAX_KEYS)
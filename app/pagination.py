@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from app.models import PaginationParams
+
+# Keyset pagination over (timestamp, _id), newest first. The cursor is an opaque
+# url-safe token holding the sort key of the last document on the previous page,
+# so every page is a bounded index range scan regardless of depth.
+
+SORT = [("timestamp", -1), ("_id", -1)]
+
+def encode_cursor(doc: dict) -> str:
+    payload = json.dumps({"t": doc["timestamp"].isoformat(), "id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def keyset_filter(query: dict, after: Optional[str]) -> dict:
+    if not after:
+        return query
+    timestamp, last_id = decode_cursor(after)
+    return {**query, "$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "_id": {"$lt": last_id}},
+    ]}
+
+async def fetch_page(collection, query: dict, params: PaginationParams) -> Tuple[List[dict], Optional[str]]:
+    cursor = collection.find(keyset_filter(query, params.after)).sort(SORT)
+    if params.offset and not params.after:
+        # Legacy offset paging, kept for existing clients; prefer `after`
+        cursor = cursor.skip(params.offset)
+    docs = await cursor.limit(params.limit).to_list(length=params.limit)
+    next_cursor = encode_cursor(docs[-1]) if len(docs) == params.limit else None
+    return docs, next_cursor
@@ -0,0 +1,127 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream circuit open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+# Fails upstream calls fast once they keep failing. After failure_threshold
+# consecutive failures the circuit opens for reset_timeout seconds; afterwards a
+# single probe call is let through (half-open) and its outcome closes or reopens
+# the circuit. A Retry-After from the upstream holds the circuit open for at
+# least that long, regardless of the failure count.
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._open_until = 0.0
+        self._probe_started: Optional[float] = None
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if time.monotonic() < self._open_until:
+            return "open"
+        if self.failures >= self.failure_threshold:
+            return "half_open"
+        return "closed"
+
+    def before_call(self):
+        now = time.monotonic()
+        state = self.state
+        if state == "open":
+            self.rejected += 1
+            raise CircuitOpenError(self._open_until - now)
+        if state == "half_open":
+            # A probe that never reported back (e.g. cancelled) expires after reset_timeout
+            if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(self.reset_timeout - (now - self._probe_started))
+            self._probe_started = now
+
+    def record_success(self):
+        self.failures = 0
+        self._probe_started = None
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        self.failures += 1
+        self._probe_started = None
+        if self.failures >= self.failure_threshold:
+            self._open(self.reset_timeout)
+        if retry_after:
+            self._open(retry_after)
+
+    def _open(self, seconds: float):
+        until = time.monotonic() + seconds
+        if until > self._open_until:
+            if self.state != "open":
+                self.opened += 1
+            self._open_until = until
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+# Caps retries at a fraction of first attempts, so retries cannot multiply the
+# load on an upstream that is already struggling. Each request deposits `ratio`
+# tokens and each retry spends one; `min_per_second` tokens accrue regardless so
+# a quiet process can still retry the occasional transient failure.
+class RetryBudget:
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._refilled_at = time.monotonic()
+        self.retries = 0
+        self.exhausted = 0
+
+    def _refill(self, amount: float):
+        self._tokens = min(self.max_tokens, self._tokens + amount)
+
+    def record_request(self):
+        self._refill(self.ratio)
+
+    def try_spend(self) -> bool:
+        now = time.monotonic()
+        self._refill((now - self._refilled_at) * self.min_per_second)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            self.retries += 1
+            return True
+        self.exhausted += 1
+        return False
+
+    def stats(self) -> dict:
+        return {"tokens": round(self._tokens, 2), "retries": self.retries, "exhausted": self.exhausted}
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    # "Full jitter": uniformly random up to the exponential backoff for this attempt
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After is either delay-seconds or an HTTP-date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
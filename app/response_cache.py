@@ -0,0 +1,76 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Tuple
+import orjson
+from fastapi import Request, Response
+from app.config import config
+
+# Caches serialized JSON bodies of read endpoints, keyed by path and query
+# string, with an ETag so clients holding the current body get a 304. The
+# ingestion cycle calls invalidate() after writing new data; entries also expire
+# after ttl seconds so workers that do not ingest converge too.
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._version = 0
+        self._entries: "OrderedDict[str, Tuple[int, float, bytes, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def invalidate(self):
+        self._version += 1
+        self._entries.clear()
+
+    def _lookup(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        version, stored_at, body, etag = entry
+        if version != self._version or time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body, etag
+
+    def _store(self, key: str, version: int, body: bytes, etag: str):
+        if version != self._version:
+            # Invalidated while the body was being built; don't cache stale data
+            return
+        self._entries[key] = (version, time.monotonic(), body, etag)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def respond(self, request: Request, build: Callable[[], Awaitable[Any]]) -> Response:
+        key = f"{request.url.path}?{request.url.query}"
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            body, etag = cached
+        else:
+            self.misses += 1
+            version = self._version
+            body = orjson.dumps(await build())
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            self._store(key, version, body, etag)
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in request.headers.get("if-none-match", ""):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+response_cache = ResponseCache(config.RESPONSE_CACHE_TTL_SECONDS, config.RESPONSE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+from app.config import config
+from app.database import get_db
+from app.logger import weather_logger as logger
+
+# Data retention. Raw readings are kept at full resolution for RAW_RETENTION_DAYS
+# and expire through the time-series collection's expireAfterSeconds. Before
+# that, compact_readings() folds every completed hour into one document per
+# (city, hour) in weather_hourly, which has its own TTL. History queries older
+# than the raw window read the hourly tier instead (see history_tiers). Read
+# notifications, all notifications and weather alerts expire through TTL
+# indexes. A retention of 0 days keeps the data forever.
+
+HOURLY_COLLECTION = "weather_hourly"
+STATE_COLLECTION = "compaction_state"
+STATE_ID = "weather_hourly"
+COMPACTION_CHUNK = timedelta(days=1)
+DAY_SECONDS = 86400
+
+# (collection, date field, retention in days) for the TTL indexes
+TTL_INDEXES = [
+    ("notifications", "read_at", config.READ_NOTIFICATION_TTL_DAYS),
+    ("notifications", "timestamp", config.NOTIFICATION_RETENTION_DAYS),
+    ("weather_alerts", "timestamp", config.ALERT_RETENTION_DAYS),
+    (HOURLY_COLLECTION, "timestamp", config.HOURLY_RETENTION_DAYS),
+]
+
+def _hour_floor(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+async def _single_field_index(collection, field: str) -> Optional[dict]:
+    # The index on exactly `field` (either direction), whatever its name
+    async for index in collection.list_indexes():
+        if list(index["key"].keys()) == [field]:
+            return index
+    return None
+
+async def _ensure_ttl_index(collection, field: str, seconds: int):
+    # Looks the index up by key, since a TTL can only live on a single-field index
+    # and MongoDB allows one index per key: a TTL set earlier is changed or
+    # dropped in place, and a plain index on the field is given the TTL
+    existing = await _single_field_index(collection, field)
+    current = existing.get("expireAfterSeconds") if existing is not None else None
+    if seconds <= 0:
+        # Retention disabled: drop the TTL index an earlier setting may have created
+        if current is not None:
+            await collection.drop_index(existing["name"])
+            logger.info(f"Removed TTL on {collection.name}.{field}")
+        return
+    if existing is None:
+        await collection.create_index([(field, ASCENDING)], name=f"{field}_ttl", expireAfterSeconds=seconds)
+    elif current == seconds:
+        return
+    else:
+        await collection.database.command({"collMod": collection.name, "index": {"name": existing["name"], "expireAfterSeconds": seconds}})
+    logger.info(f"Ensured TTL of {seconds}s on {collection.name}.{field}")
+
+async def _ensure_raw_retention(db):
+    name = config.WEATHER_COLLECTION
+    seconds = config.RAW_RETENTION_DAYS * DAY_SECONDS
+    existing = await db.list_collections(filter={"name": name}).to_list(length=1)
+    if not existing:
+        return
+    if existing[0].get("type") == "timeseries":
+        # Whole buckets are dropped once all of their readings have expired
+        current = existing[0].get("options", {}).get("expireAfterSeconds")
+        if current != (seconds or None):
+            await db.command({"collMod": name, "expireAfterSeconds": seconds or "off"})
+            logger.info(f"Set raw reading retention on '{name}' to {config.RAW_RETENTION_DAYS} days")
+    else:
+        await _ensure_ttl_index(db[name], "timestamp", seconds)
+
+async def ensure_retention(db):
+    await _ensure_raw_retention(db)
+    for collection_name, field, days in TTL_INDEXES:
+        try:
+            await _ensure_ttl_index(db[collection_name], field, days * DAY_SECONDS)
+        except OperationFailure as e:
+            logger.error(f"Could not set retention on {collection_name}.{field}: {str(e)}")
+
+def compaction_pipeline(start: datetime, end: datetime) -> List[dict]:
+    # Hourly aggregates of raw readings in [start, end), shaped like a reading
+    # (main is the hour's dominant condition, temp/feels_like its averages) so
+    # history can return both tiers together
+    return [
+        {"$match": {"timestamp": {"$gte": start, "$lt": end}}},
+        {"$group": {
+            "_id": {"city": "$city", "timestamp": {"$dateTrunc": {"date": "$timestamp", "unit": "hour"}}},
+            "temp": {"$avg": "$temp"},
+            "feels_like": {"$avg": "$feels_like"},
+            "min_temp": {"$min": "$temp"},
+            "max_temp": {"$max": "$temp"},
+            "samples": {"$sum": 1},
+            "conditions": {"$push": "$main"},
+        }},
+        {"$set": {"conditions": {"$arrayToObject": {"$map": {
+            "input": {"$setUnion": ["$conditions"]},
+            "as": "condition",
+            "in": {"k": "$$condition", "v": {"$size": {"$filter": {
+                "input": "$conditions", "cond": {"$eq": ["$$this", "$$condition"]},
+            }}}},
+        }}}}},
+        {"$project": {
+            "_id": 0,
+            "city": "$_id.city",
+            "timestamp": "$_id.timestamp",
+            "main": {"$getField": {"field": "k", "input": {"$reduce": {
+                "input": {"$objectToArray": "$conditions"},
+                "initialValue": {"k": None, "v": 0},
+                "in": {"$cond": [{"$gt": ["$$this.v", "$$value.v"]}, "$$this", "$$value"]},
+            }}}},
+            "temp": 1,
+            "feels_like": 1,
+            "min_temp": 1,
+            "max_temp": 1,
+            "samples": 1,
+            "conditions": 1,
+            "resolution": {"$literal": "hour"},
+        }},
+        {"$merge": {
+            "into": HOURLY_COLLECTION,
+            "on": ["city", "timestamp"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }},
+    ]
+
+async def compact_readings():
+    # Compacts every completed hour since the last run, a day at a time, moving
+    # the watermark after each chunk so an interrupted run resumes where it stopped
+    db = get_db()
+    end = _hour_floor(datetime.utcnow())
+    state = await db[STATE_COLLECTION].find_one({"_id": STATE_ID})
+    start = state["compacted_until"] if state else None
+    if start is None:
+        first = await db[config.WEATHER_COLLECTION].find_one({}, {"timestamp": 1}, sort=[("timestamp", ASCENDING)])
+        if first is None:
+            return
+        start = _hour_floor(first["timestamp"])
+
+    boundary = history_boundary()
+    if boundary is not None and start < boundary:
+        logger.warning(f"Compaction is behind the raw retention window: readings before {boundary} may have expired uncompacted")
+
+    compacted = timedelta()
+    while start < end:
+        chunk_end = min(start + COMPACTION_CHUNK, end)
+        await db[config.WEATHER_COLLECTION].aggregate(compaction_pipeline(start, chunk_end)).to_list(length=None)
+        await db[STATE_COLLECTION].update_one({"_id": STATE_ID}, {"$set": {"compacted_until": chunk_end}}, upsert=True)
+        compacted += chunk_end - start
+        start = chunk_end
+    if compacted:
+        logger.info(f"Compacted {int(compacted.total_seconds() // 3600)} hour(s) of readings up to {end}")
+
+def history_boundary() -> Optional[datetime]:
+    # Readings at or after this instant are read raw, older ones from the hourly tier
+    if config.RAW_RETENTION_DAYS <= 0:
+        return None
+    return _hour_floor(datetime.utcnow() - timedelta(days=config.RAW_RETENTION_DAYS))
+
+def history_tiers(query: dict) -> List[Tuple[str, dict]]:
+    # Splits a history query ({"city", "timestamp": {"$gte"[, "$lte"]}}) across the
+    # raw and hourly collections, newest tier first
+    boundary = history_boundary()
+    timestamp = query["timestamp"]
+    if boundary is None or timestamp["$gte"] >= boundary:
+        return [(config.WEATHER_COLLECTION, query)]
+    tiers = []
+    if timestamp.get("$lte") is None or timestamp["$lte"] >= boundary:
+        tiers.append((config.WEATHER_COLLECTION, {**query, "timestamp": {**timestamp, "$gte": boundary}}))
+    tiers.append((HOURLY_COLLECTION, {**query, "timestamp": {**timestamp, "$lt": boundary}}))
+    return tiers
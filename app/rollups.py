@@ -0,0 +1,111 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+from pymongo import UpdateOne
+from app.database import get_db
+from app.logger import weather_logger as logger
+
+# Weekly and monthly rollups of daily_summaries, stored in summary_rollups as one
+# document per (city, period, period_start). Every write to a daily summary
+# increments its PENDING_FIELD in the same update, so the mark survives restarts
+# and is seen by whichever worker refreshes next. refresh_rollups() re-aggregates
+# only the weeks and months containing pending days, merging the results in place
+# with $merge, then clears the marks it has seen (unless bumped again meanwhile).
+
+ROLLUP_COLLECTION = "summary_rollups"
+PERIODS = ("week", "month")
+PENDING_FIELD = "rollup_pending"
+
+def period_bounds(period: str, day: date) -> Tuple[date, date]:
+    if period == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    start = day.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+def _period_start_expr(period: str) -> dict:
+    if period == "week":
+        return {"$dateToString": {"format": "%Y-%m-%d", "date": {"$dateTrunc": {
+            "date": {"$dateFromString": {"dateString": "$date"}},
+            "unit": "week",
+            "startOfWeek": "monday",
+        }}}}
+    return {"$concat": [{"$substrBytes": ["$date", 0, 7]}, "-01"]}
+
+def rollup_pipeline(period: str, ranges: List[dict]) -> List[dict]:
+    # All (condition, count) pairs of the period's days, merged into one counter below
+    condition_pairs = {"$reduce": {
+        "input": "$conditions",
+        "initialValue": [],
+        "in": {"$concatArrays": ["$$value", {"$objectToArray": "$$this"}]},
+    }}
+    return [
+        {"$match": {"$or": ranges}},
+        {"$group": {
+            "_id": {"city": "$city", "period_start": _period_start_expr(period)},
+            # Summaries written before running sums were stored only carry the average
+            "sum_temp": {"$sum": {"$ifNull": ["$sum_temp", {"$multiply": ["$avg_temp", "$total_entries"]}]}},
+            "total_entries": {"$sum": "$total_entries"},
+            "max_temp": {"$max": "$max_temp"},
+            "min_temp": {"$min": "$min_temp"},
+            "days": {"$sum": 1},
+            "conditions": {"$push": {"$ifNull": ["$conditions", {"$arrayToObject": [[{"k": "$dominant_condition", "v": "$total_entries"}]]}]}},
+        }},
+        {"$set": {"conditions": condition_pairs}},
+        {"$set": {"conditions": {"$arrayToObject": {"$map": {
+            "input": {"$setUnion": ["$conditions.k"]},
+            "as": "k",
+            "in": {"k": "$$k", "v": {"$sum": {"$map": {
+                "input": {"$filter": {"input": "$conditions", "as": "kv", "cond": {"$eq": ["$$kv.k", "$$k"]}}},
+                "as": "kv",
+                "in": "$$kv.v",
+            }}}},
+        }}}}},
+        {"$project": {
+            "_id": 0,
+            "city": "$_id.city",
+            "period": {"$literal": period},
+            "period_start": "$_id.period_start",
+            "sum_temp": 1,
+            "total_entries": 1,
+            "avg_temp": {"$divide": ["$sum_temp", "$total_entries"]},
+            "max_temp": 1,
+            "min_temp": 1,
+            "days": 1,
+            "conditions": 1,
+            "dominant_condition": {"$getField": {"field": "k", "input": {"$reduce": {
+                "input": {"$objectToArray": "$conditions"},
+                "initialValue": {"k": None, "v": 0},
+                "in": {"$cond": [{"$gt": ["$$this.v", "$$value.v"]}, "$$this", "$$value"]},
+            }}}},
+        }},
+        {"$merge": {
+            "into": ROLLUP_COLLECTION,
+            "on": ["city", "period", "period_start"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }},
+    ]
+
+async def refresh_rollups():
+    summaries = get_db()["daily_summaries"]
+    pending = await summaries.find(
+        {PENDING_FIELD: {"$exists": True}}, {"city": 1, "date": 1, PENDING_FIELD: 1}
+    ).to_list(length=None)
+    if not pending:
+        return
+
+    for period in PERIODS:
+        ranges: Dict[Tuple[str, str], dict] = {}
+        for doc in pending:
+            start, end = period_bounds(period, datetime.strptime(doc["date"], "%Y-%m-%d").date())
+            key = (doc["city"], start.isoformat())
+            ranges[key] = {"city": doc["city"], "date": {"$gte": start.isoformat(), "$lt": end.isoformat()}}
+        await summaries.aggregate(rollup_pipeline(period, list(ranges.values()))).to_list(length=None)
+
+    # A day updated again since it was read keeps its mark for the next refresh
+    await summaries.bulk_write([
+        UpdateOne({"_id": doc["_id"], PENDING_FIELD: doc[PENDING_FIELD]}, {"$unset": {PENDING_FIELD: ""}})
+        for doc in pending
+    ], ordered=False)
+    logger.info(f"Refreshed rollups for {len(pending)} changed city-days")
@@ -1,40 +1,159 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from app.services import fetch_weather_data, create_notification
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import ORJSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.services import fetch_weather_data, fetch_weather_data_batch, fetch_weather_data_individually, create_notification, upstream_stats
 from app.config import config
-from app.models import WeatherData, AlertThreshold, WeatherAlert, Notification, PaginationParams, DateRange
-from motor.motor_asyncio import AsyncIOMotorClient
+from app.models import City, WeatherData, AlertThreshold, PaginationParams, DateRange, NotificationPage, WeatherAlertPage, AlertRule
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Optional, List
 from bson import ObjectId
 from app.tasks import calculate_daily_summary
-from datetime import datetime, timedelta
+from app.database import check_query_plans, get_db, pool_stats
+from app.pagination import fetch_page
+from app.streaming import ChainedCursor, stream_cursor
+from app.retention import history_boundary, history_tiers
+from app.cache import weather_cache
+from app.cities import CITY_COLLECTION, CityEntry, city_registry
+from app.response_cache import response_cache
+from app.rollups import PENDING_FIELD, ROLLUP_COLLECTION, period_bounds, refresh_rollups
+from app.stats import stats_pipeline, format_stats
+from pymongo.errors import OperationFailure
+from app.thresholds import threshold_index, rule_index
+from app.notifications import notification_writer, alert_writer, alert_cooldown
+from datetime import datetime, timedelta, timezone
 from app.logger import api_logger as logger
 
-client = AsyncIOMotorClient(config.MONGO_URI)
-db = client.weather_app  # Explicitly specify the database name
-collection = db[config.WEATHER_COLLECTION]
-
 router = APIRouter()
 
+# Upstream failures for which /weather/{city} falls back to the last stored reading
+UPSTREAM_UNAVAILABLE = {502, 503, 504}
+
+HISTORY_COLUMNS = ["city", "timestamp", "main", "temp", "feels_like"]
+SUMMARY_COLUMNS = ["date", "city", "avg_temp", "max_temp", "min_temp", "dominant_condition", "total_entries"]
+
 @router.get("/")
 async def root():
     return {"message": "Welcome to the Weather API"}
 
 @router.get("/cities")
-async def get_cities():
-    return {"cities": ["Delhi", "Mumbai", "Chennai", "Bangalore", "Kolkata", "Hyderabad"]}
+async def get_cities(request: Request):
+    async def build():
+        return {"cities": city_registry.names()}
+    return await response_cache.respond(request, build)
+
+@router.post("/cities")
+async def add_city(city: City, db: AsyncIOMotorDatabase = Depends(get_db)):
+    try:
+        await db[CITY_COLLECTION].update_one(
+            {"_id": city.name},
+            {"$set": {"owm_id": city.owm_id, "active": city.active}},
+            upsert=True
+        )
+        city_registry.set(CityEntry(city.name, city.owm_id, city.active))
+        response_cache.invalidate()
+        logger.info(f"City {city.name} registered")
+        return {"message": f"City {city.name} registered"}
+    except Exception as e:
+        logger.error(f"Error registering city {city.name}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error registering city")
+
+@router.delete("/cities/{city}")
+async def deactivate_city(city: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    # Stops polling the city; its stored readings and summaries are kept
+    doc = await db[CITY_COLLECTION].find_one_and_update({"_id": city}, {"$set": {"active": False}})
+    if doc is None:
+        raise HTTPException(status_code=404, detail=f"City not found: {city}")
+    city_registry.set(CityEntry(city, doc.get("owm_id"), False))
+    response_cache.invalidate()
+    return {"message": f"City {city} deactivated"}
+
+@router.get("/weather", response_model=List[WeatherData])
+async def get_weather_batch(cities: str = Query(..., description="Comma-separated city names")):
+    city_list = [city.strip() for city in cities.split(",") if city.strip()]
+    if not city_list:
+        raise HTTPException(status_code=400, detail="At least one city is required")
+    try:
+        cached, missing = weather_cache.split(city_list)
+        if not missing:
+            return cached
+        if config.USE_GROUP_ENDPOINT:
+            fetched = await fetch_weather_data_batch(missing)
+        else:
+            fetched = await fetch_weather_data_individually(missing)
+        for weather_data in fetched:
+            weather_cache.put(weather_data)
+        return cached + fetched
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Unexpected error fetching weather data for {city_list}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
 @router.get("/weather/{city}", response_model=WeatherData)
-async def get_weather(city: str):
+async def get_weather(city: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     try:
-        return await fetch_weather_data(city)
+        return await weather_cache.get_or_fetch(city, fetch_weather_data)
     except HTTPException as he:
+        if he.status_code in UPSTREAM_UNAVAILABLE:
+            # Upstream is down or the circuit is open: serve the last stored reading, marked stale
+            last = await db[config.WEATHER_COLLECTION].find_one({"city": city}, {"_id": 0}, sort=[("timestamp", -1)])
+            if last is not None:
+                logger.warning(f"Serving stale weather data for {city}: {he.detail}")
+                return ORJSONResponse({**last, "stale": True}, headers=he.headers)
         raise he
     except Exception as e:
         logger.error(f"Unexpected error fetching weather data for {city}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
+@router.get("/summaries/compare")
+async def compare_summaries(
+    cities: str = Query(..., description="Comma-separated city names"),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    # Aligned series for several cities from a single query: daily_summaries for
+    # day granularity, the pre-aggregated summary_rollups for week and month
+    city_list = [city.strip() for city in cities.split(",") if city.strip()]
+    if not city_list:
+        raise HTTPException(status_code=400, detail="At least one city is required")
+    start_date = start_date or (datetime.utcnow().date() - timedelta(days=90)).strftime("%Y-%m-%d")
+    try:
+        start_day = datetime.strptime(start_date, "%Y-%m-%d").date()
+        if end_date:
+            datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+    if granularity == "day":
+        collection, key = db["daily_summaries"], "date"
+        query = {"city": {"$in": city_list}, "date": {"$gte": start_date}}
+    else:
+        collection, key = db[ROLLUP_COLLECTION], "period_start"
+        # Include the period that contains start_date
+        first_period = period_bounds(granularity, start_day)[0]
+        query = {"period": granularity, "city": {"$in": city_list}, "period_start": {"$gte": first_period.isoformat()}}
+    if end_date:
+        query[key]["$lte"] = end_date
+
+    fields = {"_id": 0, "city": 1, key: 1, "avg_temp": 1, "max_temp": 1, "min_temp": 1, "dominant_condition": 1, "total_entries": 1}
+    rows = {}
+    async for doc in collection.find(query, fields).sort(key, 1):
+        rows.setdefault(doc.pop(key), {})[doc.pop("city")] = doc
+
+    periods = list(rows)
+    return {
+        "granularity": granularity,
+        "periods": periods,
+        "series": {city: [rows[period].get(city) for period in periods] for city in city_list},
+    }
+
 @router.get("/summaries/{city}/")
-async def get_daily_summary(city: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
+async def get_daily_summary(request: Request, city: str, start_date: Optional[str] = None, end_date: Optional[str] = None, db: AsyncIOMotorDatabase = Depends(get_db)):
+    return await response_cache.respond(request, lambda: _daily_summaries(db, city, start_date, end_date))
+
+async def _daily_summaries(db: AsyncIOMotorDatabase, city: str, start_date: Optional[str], end_date: Optional[str]) -> dict:
     query = {"city": city}
 
     if start_date:
@@ -51,7 +170,7 @@ async def get_daily_summary(city: str, start_date: Optional[str] = None, end_dat
         thirty_days_ago = (today - timedelta(days=30)).strftime("%Y-%m-%d")
         query["date"] = {"$gte": thirty_days_ago}
 
-    cursor = db["daily_summaries"].find(query).sort("date", -1)
+    cursor = db["daily_summaries"].find(query, {PENDING_FIELD: 0}).sort("date", -1)
     summaries = []
     async for summary in cursor:
         summary['_id'] = str(summary['_id'])
@@ -59,38 +178,66 @@ async def get_daily_summary(city: str, start_date: Optional[str] = None, end_dat
 
     if not summaries:
         raise HTTPException(status_code=404, detail="No summaries found for the given criteria.")
-    
+
     return {"summaries": summaries}
 
 @router.post("/trigger-summary-calculation")
-async def trigger_summary_calculation():
-    cities = ["Delhi", "Mumbai", "Chennai", "Bangalore", "Kolkata", "Hyderabad"]
-    for city in cities:
-        try:
-            await calculate_daily_summary(city)
-            logger.info(f"Daily summary calculation triggered for {city}")
-        except Exception as e:
-            logger.error(f"Error calculating daily summary for {city}: {str(e)}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"Error calculating daily summary for {city}")
-    return {"message": "Daily summary calculation triggered for all cities"}
+async def trigger_summary_calculation(date: Optional[str] = None, rebuild: bool = False, db: AsyncIOMotorDatabase = Depends(get_db)):
+    # Summaries are kept current by the ingestion cycle, so by default this only
+    # reads them back. rebuild=true recomputes them from raw readings (repair).
+    date = date or datetime.utcnow().strftime("%Y-%m-%d")
+    cities = city_registry.names()
+    if rebuild:
+        for city in cities:
+            try:
+                await calculate_daily_summary(city, date)
+                logger.info(f"Daily summary recalculation triggered for {city} on {date}")
+            except Exception as e:
+                logger.error(f"Error calculating daily summary for {city}: {str(e)}", exc_info=True)
+                raise HTTPException(status_code=500, detail=f"Error calculating daily summary for {city}")
 
-@router.get("/all-summaries")
-async def get_all_summaries():
-    cursor = db["daily_summaries"].find()
     summaries = []
-    async for summary in cursor:
+    async for summary in db["daily_summaries"].find({"date": date, "city": {"$in": cities}}, {PENDING_FIELD: 0}):
         summary['_id'] = str(summary['_id'])
         summaries.append(summary)
-    return {"summaries": summaries}
+    if rebuild:
+        # Fold the rebuilt days into the rollups now rather than on the next cycle
+        try:
+            await refresh_rollups()
+        except Exception as e:
+            logger.error(f"Error refreshing summary rollups: {str(e)}", exc_info=True)
+        response_cache.invalidate()
+    message = "Daily summaries recalculated for all cities" if rebuild else "Daily summaries are up to date for all cities"
+    return {"message": message, "summaries": summaries}
+
+@router.get("/all-summaries")
+async def get_all_summaries(request: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
+    async def build():
+        summaries = []
+        async for summary in db["daily_summaries"].find({}, {PENDING_FIELD: 0}):
+            summary['_id'] = str(summary['_id'])
+            summaries.append(summary)
+        return {"summaries": summaries}
+    return await response_cache.respond(request, build)
+
+@router.get("/all-summaries/stream")
+async def stream_all_summaries(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    batch_size: int = Query(config.STREAM_BATCH_SIZE, ge=1, le=10000),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    cursor = db["daily_summaries"].find({}, {"_id": 0, PENDING_FIELD: 0})
+    return stream_cursor(cursor, format, batch_size, SUMMARY_COLUMNS, "all-summaries")
 
 @router.post("/set-alert-threshold")
-async def set_alert_threshold(threshold: AlertThreshold):
+async def set_alert_threshold(threshold: AlertThreshold, db: AsyncIOMotorDatabase = Depends(get_db)):
     try:
         result = await db["alert_thresholds"].update_one(
             {"city": threshold.city},
             {"$set": threshold.dict(exclude_unset=True)},
             upsert=True
         )
+        threshold_index.set(threshold)
         logger.info(f"Alert threshold set for {threshold.city}")
         return {"message": "Alert threshold set successfully"}
     except Exception as e:
@@ -98,75 +245,174 @@ async def set_alert_threshold(threshold: AlertThreshold):
         raise HTTPException(status_code=500, detail="Error setting alert threshold")
 
 @router.get("/alert-threshold/{city}")
-async def get_alert_threshold(city: str):
+async def get_alert_threshold(city: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     threshold = await db["alert_thresholds"].find_one({"city": city})
     if threshold:
         return AlertThreshold(**threshold)
     raise HTTPException(status_code=404, detail=f"No alert threshold found for {city}")
 
-@router.get("/weather-alerts/{city}")
-async def get_weather_alerts(city: str, limit: int = 10):
-    cursor = db["weather_alerts"].find({"city": city}).sort("timestamp", -1).limit(limit)
-    alerts = []
-    async for alert in cursor:
-        alerts.append(WeatherAlert(**alert))
-    return alerts
+@router.post("/alert-rules", response_model=AlertRule)
+async def create_alert_rule(rule: AlertRule, db: AsyncIOMotorDatabase = Depends(get_db)):
+    try:
+        result = await db["alert_rules"].insert_one(rule.dict(exclude={'id'}))
+        rule.id = str(result.inserted_id)
+        rule_index.set(rule)
+        logger.info(f"Alert rule {rule.id} created for {rule.city}")
+        return rule
+    except Exception as e:
+        logger.error(f"Error creating alert rule: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error creating alert rule")
+
+@router.get("/alert-rules/{city}", response_model=List[AlertRule])
+async def get_alert_rules(city: str, subscriber: Optional[str] = None):
+    return [rule for rule in rule_index.for_city(city) if subscriber is None or rule.subscriber == subscriber]
 
-@router.get("/notifications", response_model=List[Notification])
-async def get_notifications(params: PaginationParams = Depends()):
+@router.delete("/alert-rules/{rule_id}")
+async def delete_alert_rule(rule_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    if not ObjectId.is_valid(rule_id):
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    result = await db["alert_rules"].delete_one({"_id": ObjectId(rule_id)})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    rule_index.remove(rule_id)
+    return {"message": "Alert rule deleted"}
+
+@router.get("/weather-alerts/{city}", response_model=WeatherAlertPage)
+async def get_weather_alerts(city: str, params: PaginationParams = Depends(), db: AsyncIOMotorDatabase = Depends(get_db)):
+    docs, next_cursor = await fetch_page(db["weather_alerts"], {"city": city}, params)
+    # Documents come from our own writer, so they are serialized as-is rather
+    # than re-validated through WeatherAlert
+    for alert in docs:
+        alert['id'] = str(alert.pop('_id'))
+    return ORJSONResponse({"alerts": docs, "next_cursor": next_cursor})
+
+@router.get("/notifications", response_model=NotificationPage)
+async def get_notifications(params: PaginationParams = Depends(), db: AsyncIOMotorDatabase = Depends(get_db)):
     try:
-        cursor = db["notifications"].find().sort("timestamp", -1).skip(params.offset).limit(params.limit)
-        return [Notification(**doc) for doc in await cursor.to_list(length=params.limit)]
+        docs, next_cursor = await fetch_page(db["notifications"], {}, params)
+        for doc in docs:
+            doc['id'] = str(doc.pop('_id'))
+        return ORJSONResponse({"notifications": docs, "next_cursor": next_cursor})
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Error fetching notifications: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error fetching notifications")
 
-@router.get("/notifications/{city}")
-async def get_city_notifications(city: str, limit: int = 10, offset: int = 0):
-    cursor = db["notifications"].find({"city": city}).sort("timestamp", -1).skip(offset).limit(limit)
-    notifications = []
-    async for doc in cursor:
+@router.get("/notifications/{city}", response_model=NotificationPage)
+async def get_city_notifications(city: str, params: PaginationParams = Depends(), db: AsyncIOMotorDatabase = Depends(get_db)):
+    docs, next_cursor = await fetch_page(db["notifications"], {"city": city}, params)
+    for doc in docs:
         doc['id'] = str(doc.pop('_id'))
-        notifications.append(Notification(**doc))
-    return {"notifications": notifications}
+    return ORJSONResponse({"notifications": docs, "next_cursor": next_cursor})
 
 @router.put("/notifications/{notification_id}/read")
-async def mark_notification_as_read(notification_id: str):
+async def mark_notification_as_read(notification_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
     result = await db["notifications"].update_one(
-        {"_id": ObjectId(notification_id)},
-        {"$set": {"is_read": True}}
+        {"_id": ObjectId(notification_id), "is_read": {"$ne": True}},
+        {"$set": {"is_read": True, "read_at": datetime.utcnow()}}
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Notification not found")
     return {"message": "Notification marked as read"}
 
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Stored timestamps are naive UTC; an offset-aware date (e.g. a "Z" suffix) is converted to match
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _history_query(city: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> dict:
+    try:
+        date_range = DateRange(start_date=_naive_utc(start_date), end_date=_naive_utc(end_date))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Always bound the scan so only the relevant time-series buckets are read:
+    # without a start, take the HISTORY_DEFAULT_DAYS before the end (or now)
+    start = date_range.start_date or (date_range.end_date or datetime.utcnow()) - timedelta(days=config.HISTORY_DEFAULT_DAYS)
+    query = {
+        "city": city,
+        "timestamp": {"$gte": start}
+    }
+    if date_range.end_date:
+        query["timestamp"]["$lte"] = date_range.end_date
+    return query
+
 @router.get("/weather-history/{city}", response_model=List[WeatherData])
 async def get_weather_history(
     city: str, 
     start_date: datetime = Query(default=None),
-    end_date: datetime = Query(default=None)
+    end_date: datetime = Query(default=None),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     try:
-        date_range = DateRange(start_date=start_date, end_date=end_date)
-        query = {"city": city}
-        if date_range.start_date:
-            query["timestamp"] = {"$gte": date_range.start_date}
-        if date_range.end_date:
-            query["timestamp"] = query.get("timestamp", {}) | {"$lte": date_range.end_date}
-
-        cursor = db[config.WEATHER_COLLECTION].find(query).sort("timestamp", -1)
-        weather_data = [WeatherData(**doc) for doc in await cursor.to_list(length=None)]
-        
+        # Recent readings come from the raw collection, older ones from the hourly tier
+        weather_data = []
+        for collection, query in history_tiers(_history_query(city, start_date, end_date)):
+            weather_data += await db[collection].find(query, {"_id": 0}).sort("timestamp", -1).to_list(length=None)
+
         if not weather_data:
             raise HTTPException(status_code=404, detail=f"No weather data found for {city} in the specified date range")
-        
-        return weather_data
+
+        # Trusted documents from our own collection: skip per-document model validation
+        return ORJSONResponse(weather_data)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Error fetching weather history for {city}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error fetching weather history")
 
+@router.get("/weather-history/{city}/stream")
+async def stream_weather_history(
+    city: str,
+    start_date: datetime = Query(default=None),
+    end_date: datetime = Query(default=None),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    batch_size: int = Query(config.STREAM_BATCH_SIZE, ge=1, le=10000),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    cursor = ChainedCursor(
+        db[collection].find(query, {"_id": 0}).sort("timestamp", -1)
+        for collection, query in history_tiers(_history_query(city, start_date, end_date))
+    )
+    return stream_cursor(cursor, format, batch_size, HISTORY_COLUMNS, f"weather-history-{city}")
+
+@router.get("/stats/{city}")
+async def get_weather_stats(
+    city: str,
+    start_date: datetime = Query(default=None),
+    end_date: datetime = Query(default=None),
+    bucket: str = Query("hour", pattern="^(hour|day)$"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    query = _history_query(city, start_date, end_date)
+    # Percentiles and the histogram need raw readings, which expire after RAW_RETENTION_DAYS
+    boundary = history_boundary()
+    if boundary is not None and query["timestamp"]["$gte"] < boundary:
+        raise HTTPException(status_code=400, detail=f"Statistics are only available from {boundary.isoformat()}; use /weather-history for older hourly data")
+    collection = db[config.WEATHER_COLLECTION]
+    try:
+        try:
+            results = await collection.aggregate(stats_pipeline(query, bucket)).to_list(length=1)
+        except OperationFailure as e:
+            # $percentile needs MongoDB 7.0+; fall back to the remaining statistics
+            logger.warning(f"Percentile aggregation unavailable, returning stats without percentiles: {str(e)}")
+            results = await collection.aggregate(stats_pipeline(query, bucket, with_percentiles=False)).to_list(length=1)
+    except Exception as e:
+        logger.error(f"Error computing weather stats for {city}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error computing weather stats")
+
+    stats = format_stats(results[0])
+    if stats["overall"] is None:
+        raise HTTPException(status_code=404, detail=f"No weather data found for {city} in the specified date range")
+    return {"city": city, "bucket": bucket, **stats}
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @router.get("/health")
-async def health_check():
+async def health_check(db: AsyncIOMotorDatabase = Depends(get_db)):
     try:
         # Perform a simple database operation to check connectivity
         await db.command("ping")
@@ -174,3 +420,45 @@ async def health_check():
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}", exc_info=True)
         return {"status": "unhealthy", "database": "disconnected"}
+
+@router.get("/debug/query-plans")
+async def get_query_plans(db: AsyncIOMotorDatabase = Depends(get_db)):
+    if not config.DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    plans = await check_query_plans(db)
+    return {"collscans": [plan["query"] for plan in plans if plan["collscan"]], "plans": plans}
+
+@router.get("/debug/pool-stats")
+async def get_pool_stats():
+    if not config.DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return pool_stats.snapshot()
+
+@router.get("/debug/cache-stats")
+async def get_cache_stats():
+    if not config.DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return weather_cache.stats()
+
+@router.get("/debug/write-stats")
+async def get_write_stats():
+    if not config.DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {
+        "notifications": notification_writer.stats(),
+        "weather_alerts": alert_writer.stats(),
+        "suppressed_by_cooldown": alert_cooldown.suppressed,
+        "evicted_from_cooldown": alert_cooldown.evicted,
+    }
+
+@router.get("/debug/upstream-stats")
+async def get_upstream_stats():
+    if not config.DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return upstream_stats()
+
+@router.get("/debug/response-cache-stats")
+async def get_response_cache_stats():
+    if not config.DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response_cache.stats()
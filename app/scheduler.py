@@ -0,0 +1,116 @@
+import asyncio
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from pymongo.errors import DuplicateKeyError
+from app.logger import main_logger as logger
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Lease document in Mongo that lets only one worker/replica run a job at a time.
+# The holder renews the lease on every tick; if it dies, another worker takes
+# over once the lease has expired.
+class LeaderLock:
+    def __init__(self, collection, name: str, ttl_seconds: float, owner: Optional[str] = None):
+        self.collection = collection
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.owner = owner or worker_id()
+        self.is_leader = False
+
+    async def acquire(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            await self.collection.find_one_and_update(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + self.ttl, "renewed_at": now}},
+                upsert=True
+            )
+            acquired = True
+        except DuplicateKeyError:
+            # Another live owner holds the lease, so the upsert collided with its document
+            acquired = False
+
+        if acquired != self.is_leader:
+            logger.info(f"{'Acquired' if acquired else 'Lost'} leader lock '{self.name}' as {self.owner}")
+        self.is_leader = acquired
+        return acquired
+
+    async def release(self):
+        if self.is_leader:
+            await self.collection.delete_one({"_id": self.name, "owner": self.owner})
+            self.is_leader = False
+            logger.info(f"Released leader lock '{self.name}'")
+
+# Runs an async job every `interval` seconds inside the event loop. A cycle is
+# awaited before the next one is scheduled, so a slow cycle never overlaps the
+# next; ticks missed while it ran are skipped rather than replayed back to back.
+class PeriodicScheduler:
+    def __init__(
+        self,
+        name: str,
+        job: Callable[[], Awaitable[None]],
+        interval: float,
+        jitter: float = 0,
+        lock: Optional[LeaderLock] = None,
+    ):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self.jitter = jitter
+        self.lock = lock
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stop.clear()
+            self._task = asyncio.create_task(self._run(), name=f"scheduler:{self.name}")
+            logger.info(f"Scheduler '{self.name}' started with interval {self.interval}s (jitter {self.jitter}s)")
+
+    async def stop(self, timeout: float = 30):
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Scheduler '{self.name}' did not finish its cycle within {timeout}s, cancelling")
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self.lock:
+            await self.lock.release()
+        logger.info(f"Scheduler '{self.name}' stopped")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time()
+        while not self._stop.is_set():
+            try:
+                if self.lock is None or await self.lock.acquire():
+                    await self.job()
+                else:
+                    logger.debug(f"Scheduler '{self.name}' is not the leader, staying idle")
+            except Exception as e:
+                logger.error(f"Scheduler '{self.name}' cycle failed: {str(e)}", exc_info=True)
+
+            next_run += self.interval
+            now = loop.time()
+            if now > next_run:
+                missed = int((now - next_run) // self.interval) + 1
+                next_run += missed * self.interval
+                logger.warning(f"Scheduler '{self.name}' cycle overran, skipping {missed} missed tick(s)")
+
+            delay = next_run - now + random.uniform(0, self.jitter)
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
@@ -1,94 +1,203 @@
+import asyncio
 import httpx
 from app.config import config
-from datetime import datetime, timedelta
-from collections import Counter
-from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime
+from app.cities import city_registry
+from app.notifications import notification_writer
 from app.models import Notification, WeatherData
 from bson import ObjectId
+from typing import Optional, List
 import logging
+import math
+import time
 from fastapi import HTTPException
+from app.metrics import UPSTREAM_REQUEST_DURATION, timed, timed_fetch
+from app.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, backoff_delay, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
-client = AsyncIOMotorClient(config.MONGO_URI)
-db = client.weather_app
-collection = db[config.WEATHER_COLLECTION]
 
-async def fetch_weather_data(city: str) -> WeatherData:
-    url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={config.OPENWEATHERMAP_API_KEY}"
-    async with httpx.AsyncClient() as client:
+_http_client: Optional[httpx.AsyncClient] = None
+# Caps concurrent upstream requests across the ingestion cycle and API routes
+_upstream_semaphore = asyncio.Semaphore(config.FETCH_CONCURRENCY)
+upstream_breaker = CircuitBreaker(config.CIRCUIT_FAILURE_THRESHOLD, config.CIRCUIT_RESET_SECONDS)
+upstream_retry_budget = RetryBudget(config.RETRY_BUDGET_RATIO, config.RETRY_BUDGET_MIN_PER_SECOND)
+
+# Upstream statuses worth retrying; anything else is the caller's problem
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+def get_http_client() -> httpx.AsyncClient:
+    # A single keep-alive pool shared by every upstream call for the lifetime of the app
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=config.OPENWEATHERMAP_BASE_URL,
+            timeout=httpx.Timeout(config.HTTP_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def _upstream_get(path: str, params: dict) -> httpx.Response:
+    # GET against OpenWeatherMap under a deadline covering every attempt. Timeouts,
+    # connection errors and RETRYABLE_STATUSES are retried with jittered backoff
+    # (or after the upstream's Retry-After) while the deadline and the retry budget
+    # allow. Raises CircuitOpenError without calling out while the circuit is open.
+    client = get_http_client()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.UPSTREAM_DEADLINE_SECONDS
+    upstream_retry_budget.record_request()
+    attempt = 0
+    while True:
+        upstream_breaker.before_call()
+        retry_after = None
+        started = time.perf_counter()
+        outcome = "error"
         try:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            weather_data = WeatherData(
-                city=city,
-                main=data['weather'][0]['main'],
-                temp=data['main']['temp'] - 273.15,  # Convert Kelvin to Celsius
-                feels_like=data['main']['feels_like'] - 273.15,
-                timestamp=datetime.utcnow()
-            )
-            return weather_data
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                raise HTTPException(status_code=404, detail=f"City not found: {city}")
-            else:
-                raise HTTPException(status_code=500, detail="Error fetching weather data from external API")
-        except KeyError as e:
-            raise HTTPException(status_code=500, detail=f"Unexpected data format from external API: {str(e)}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
-
-async def calculate_daily_summary():
-    today = datetime.utcnow().date()
-    yesterday = today - timedelta(days=1)
-    
-    cities = ["Delhi", "Mumbai", "Chennai", "Bangalore", "Kolkata", "Hyderabad"]
-    
-    for city in cities:
-        # Fetch the latest weather data for the city
-        weather_doc = await collection.find_one({"city": city})
-        
-        if not weather_doc:
-            logger.info(f"No weather data available for {city}")
+            async with _upstream_semaphore:
+                response = await asyncio.wait_for(client.get(path, params=params), timeout=max(0.0, deadline - loop.time()))
+            outcome = str(response.status_code)
+            if response.status_code in RETRYABLE_STATUSES:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                response.raise_for_status()
+            # Other 4xx (e.g. unknown city) say nothing about upstream health
+            upstream_breaker.record_success()
+            return response
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            error = httpx.TimeoutException(f"Deadline of {config.UPSTREAM_DEADLINE_SECONDS}s exceeded for {path}")
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            error = e
+        finally:
+            UPSTREAM_REQUEST_DURATION.labels(path, outcome).observe(time.perf_counter() - started)
+        upstream_breaker.record_failure(retry_after)
+
+        delay = retry_after if retry_after is not None else backoff_delay(
+            attempt, config.UPSTREAM_BACKOFF_BASE_SECONDS, config.UPSTREAM_BACKOFF_MAX_SECONDS)
+        if (attempt >= config.UPSTREAM_MAX_RETRIES
+                or loop.time() + delay >= deadline
+                or not upstream_retry_budget.try_spend()):
+            raise error
+        attempt += 1
+        # The error's message carries the request URL, API key included, so only log its kind
+        reason = f"HTTP {error.response.status_code}" if isinstance(error, httpx.HTTPStatusError) else type(error).__name__
+        logger.warning(f"Retrying {path} in {delay:.2f}s (attempt {attempt}): {reason}")
+        await asyncio.sleep(delay)
+
+def upstream_stats() -> dict:
+    return {"circuit": upstream_breaker.stats(), "retry_budget": upstream_retry_budget.stats()}
+
+def parse_weather_data(city: str, data: dict) -> WeatherData:
+    return WeatherData(
+        city=city,
+        main=data['weather'][0]['main'],
+        temp=data['main']['temp'] - 273.15,  # Convert Kelvin to Celsius
+        feels_like=data['main']['feels_like'] - 273.15,
+        timestamp=datetime.utcnow()
+    )
+
+@timed("fetch_weather_data")
+@timed_fetch
+async def fetch_weather_data(city: str) -> WeatherData:
+    try:
+        response = await _upstream_get("/weather", {"q": city, "appid": config.OPENWEATHERMAP_API_KEY})
+        response.raise_for_status()
+        return parse_weather_data(city, response.json())
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail="Weather provider unavailable",
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail=f"Timed out fetching weather data for {city}")
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"City not found: {city}")
+        elif e.response.status_code == 429:
+            retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+            raise HTTPException(status_code=503, detail="Weather provider rate limit reached",
+                                headers={"Retry-After": str(math.ceil(retry_after or config.CIRCUIT_RESET_SECONDS))})
+        elif e.response.status_code >= 500:
+            raise HTTPException(status_code=502, detail="Weather provider error")
+        else:
+            raise HTTPException(status_code=500, detail="Error fetching weather data from external API")
+    except httpx.TransportError:
+        raise HTTPException(status_code=502, detail="Could not reach weather provider")
+    except KeyError as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected data format from external API: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+async def _fetch_group(cities: List[str]) -> List[WeatherData]:
+    ids = {city_registry.owm_id(city): city for city in cities}
+    response = await _upstream_get("/group", {
+        "id": ",".join(str(city_id) for city_id in ids),
+        "appid": config.OPENWEATHERMAP_API_KEY,
+    })
+    response.raise_for_status()
+    return [parse_weather_data(ids[item['id']], item) for item in response.json()['list'] if item.get('id') in ids]
+
+async def fetch_weather_data_individually(cities: List[str]) -> List[WeatherData]:
+    results = await asyncio.gather(*(fetch_weather_data(city) for city in cities), return_exceptions=True)
+    weather_data = []
+    for city, result in zip(cities, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error fetching weather data for {city}: {str(result)}")
+        else:
+            weather_data.append(result)
+    return weather_data
+
+async def fetch_weather_data_batch(cities: List[str]) -> List[WeatherData]:
+    # Fetches cities through the /group endpoint, up to GROUP_BATCH_SIZE IDs per call.
+    # Cities without a known ID, and every city of a failed batch, fall back to /weather.
+    # Cities that still fail are logged and left out of the result.
+    grouped = [city for city in cities if city_registry.owm_id(city) is not None]
+    individual = [city for city in cities if city_registry.owm_id(city) is None]
+    batches = [grouped[i:i + config.GROUP_BATCH_SIZE] for i in range(0, len(grouped), config.GROUP_BATCH_SIZE)]
+
+    results = await asyncio.gather(*(_fetch_group(batch) for batch in batches), return_exceptions=True)
+
+    weather_data = []
+    for batch, result in zip(batches, results):
+        if isinstance(result, CircuitOpenError):
+            # Per-city requests would be rejected the same way
+            logger.warning(f"Skipping {batch}: {str(result)}")
             continue
-        
-        # Check if the data is from yesterday
-        if weather_doc['timestamp'].date() != yesterday:
-            logger.info(f"No weather data available for {city} on {yesterday}")
+        if isinstance(result, Exception):
+            logger.warning(f"Group fetch failed for {batch}, falling back to per-city requests: {str(result)}")
+            individual.extend(batch)
             continue
-        
-        summary = {
-            "date": yesterday.strftime("%Y-%m-%d"),
-            "city": city,
-            "avg_temp": weather_doc['temp'],
-            "max_temp": weather_doc['temp'],
-            "min_temp": weather_doc['temp'],
-            "dominant_condition": weather_doc['main'],
-            "total_entries": 1
-        }
-        
-        # Store the summary in a separate collection for daily summaries
-        summary_collection = db["daily_summaries"]
-        await summary_collection.update_one(
-            {"date": summary["date"], "city": city},
-            {"$set": summary},
-            upsert=True
-        )
-        
-        logger.info(f"Daily summary for {city} on {yesterday} calculated and stored.")
+        weather_data.extend(result)
+        returned = {item.city for item in result}
+        individual.extend(city for city in batch if city not in returned)
+
+    if individual:
+        weather_data.extend(await fetch_weather_data_individually(individual))
+    return weather_data
 
 async def create_notification(notification_data: dict) -> Notification:
+    # Validates once and hands the document to the buffered writer; the insert
+    # happens in the background, so the _id is assigned here to return the id.
+    # If the writer is shedding load the notification is dropped (and counted)
+    # and the caller gets a 503 instead of the id of a notification never stored.
     try:
-        # Convert WeatherData to dict if it's not already
-        if isinstance(notification_data['weather_data'], WeatherData):
-            notification_data['weather_data'] = notification_data['weather_data'].dict()
-        
         notification = Notification(**notification_data)
-        result = await db["notifications"].insert_one(notification.dict(exclude={'id'}))
-        notification.id = str(result.inserted_id)
+        doc = notification.dict(exclude={'id'})
+        doc['_id'] = ObjectId()
+        notification.id = str(doc['_id'])
+        if not notification_writer.submit(doc):
+            raise HTTPException(status_code=503, detail="Notification queue is full",
+                                headers={"Retry-After": str(math.ceil(config.NOTIFICATION_FLUSH_INTERVAL_SECONDS))})
         return notification
+    except HTTPException:
+        raise
     except KeyError as e:
         logger.error(f"Missing key in notification data: {str(e)}", exc_info=True)
         raise HTTPException(status_code=400, detail=f"Invalid notification data: missing {str(e)}")
@@ -0,0 +1,111 @@
+import asyncio
+import bisect
+import hashlib
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+from app.logger import main_logger as logger
+from app.scheduler import LeaderLock, worker_id
+
+# Sharded ingestion: every worker process polls only its slice of the city
+# registry, so adding workers divides the per-cycle work between them.
+#
+# Cities are hashed into a fixed number of shards. Each worker keeps a membership
+# lease in `ingestion_workers`, and all live members are placed on a consistent-
+# hash ring that assigns every shard to one of them. A worker then takes a lease
+# per assigned shard in `ingestion_shards` (the LeaderLock pattern), which keeps
+# a shard with a single worker even while views of the membership differ, and
+# hands back shards that are no longer assigned to it. Ring lookups are capped
+# at a bounded load per worker, so shards spread evenly even with few workers.
+# When a worker stops, its leases are deleted and its shards move on the others'
+# next cycle; when it dies, they move once its leases expire. The ring keeps the
+# movement mostly to the shards of the worker that joined or left.
+
+VIRTUAL_NODES = 64
+BALANCE = 1.1
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+def shard_of(city: str, shard_count: int) -> int:
+    return _hash(city) % shard_count
+
+class HashRing:
+    def __init__(self, members: Iterable[str], vnodes: int = VIRTUAL_NODES):
+        self._ring = sorted((_hash(f"{member}#{i}"), member) for member in members for i in range(vnodes))
+        self._points = [point for point, _ in self._ring]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+    def assign(self, keys: List[str], balance: float = BALANCE) -> Dict[str, str]:
+        # Consistent hashing with bounded loads: a key goes to the first member
+        # clockwise from its point that holds fewer than `balance` times the
+        # average number of keys. Every worker computes the same assignment from
+        # the same membership.
+        members = {member for _, member in self._ring}
+        if not members:
+            return {}
+        capacity = math.ceil(balance * len(keys) / len(members))
+        load = dict.fromkeys(members, 0)
+        assignment = {}
+        for key in keys:
+            index = bisect.bisect(self._points, _hash(key))
+            while True:
+                member = self._ring[index % len(self._ring)][1]
+                if load[member] < capacity:
+                    break
+                index += 1
+            load[member] += 1
+            assignment[key] = member
+        return assignment
+
+class ShardCoordinator:
+    def __init__(self, db, shard_count: int, ttl_seconds: float):
+        self.workers = db["ingestion_workers"]
+        self.shard_count = shard_count
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.owner = worker_id()
+        self._leases = {
+            shard: LeaderLock(db["ingestion_shards"], f"shard:{shard}", ttl_seconds, owner=self.owner)
+            for shard in range(shard_count)
+        }
+        self.held: Set[int] = set()
+
+    async def _live_workers(self) -> List[str]:
+        now = datetime.utcnow()
+        await self.workers.update_one(
+            {"_id": self.owner},
+            {"$set": {"expires_at": now + self.ttl, "renewed_at": now}},
+            upsert=True
+        )
+        return [doc["_id"] async for doc in self.workers.find({"expires_at": {"$gt": now}}, {"_id": 1})]
+
+    async def claim(self) -> Set[int]:
+        # Renews membership, then takes/renews the leases of the shards the ring assigns here
+        live = await self._live_workers()
+        assignment = HashRing(live).assign([f"shard:{shard}" for shard in range(self.shard_count)])
+        assigned = {shard for shard in range(self.shard_count) if assignment[f"shard:{shard}"] == self.owner}
+
+        await asyncio.gather(*(self._leases[shard].release() for shard in self.held - assigned))
+        acquired = await asyncio.gather(*(self._leases[shard].acquire() for shard in assigned))
+        held = {shard for shard, ok in zip(assigned, acquired) if ok}
+
+        if held != self.held:
+            logger.info(f"Worker {self.owner} holds {len(held)}/{self.shard_count} shards "
+                        f"({len(assigned)} assigned, {len(live)} live workers)")
+        self.held = held
+        return held
+
+    def select(self, cities: Iterable[str]) -> List[str]:
+        return [city for city in cities if shard_of(city, self.shard_count) in self.held]
+
+    async def leave(self):
+        # Lets the remaining workers take over this worker's shards on their next cycle
+        await asyncio.gather(*(self._leases[shard].release() for shard in self.held))
+        self.held = set()
+        await self.workers.delete_one({"_id": self.owner})
+        logger.info(f"Worker {self.owner} left ingestion")
@@ -0,0 +1,62 @@
+from typing import List
+
+# Server-side statistics over raw readings. Everything is computed by one
+# aggregation, so only the compact result crosses the wire.
+
+PERCENTILES = [0.5, 0.9, 0.95, 0.99]
+TEMP_HISTOGRAM_BOUNDARIES = list(range(-50, 65, 5))
+
+def _temp_stats(with_percentiles: bool) -> dict:
+    stats = {
+        "count": {"$sum": 1},
+        "avg_temp": {"$avg": "$temp"},
+        "min_temp": {"$min": "$temp"},
+        "max_temp": {"$max": "$temp"},
+        "avg_feels_like": {"$avg": "$feels_like"},
+    }
+    if with_percentiles:
+        stats["temp_percentiles"] = {"$percentile": {"input": "$temp", "p": PERCENTILES, "method": "approximate"}}
+    return stats
+
+def stats_pipeline(query: dict, bucket: str, with_percentiles: bool = True) -> List[dict]:
+    return [
+        {"$match": query},
+        {"$facet": {
+            "overall": [
+                {"$group": {"_id": None, **_temp_stats(with_percentiles)}},
+                {"$project": {"_id": 0}},
+            ],
+            "buckets": [
+                {"$group": {"_id": {"$dateTrunc": {"date": "$timestamp", "unit": bucket}}, **_temp_stats(with_percentiles)}},
+                {"$sort": {"_id": 1}},
+                {"$set": {"start": "$_id"}},
+                {"$project": {"_id": 0}},
+            ],
+            "conditions": [
+                {"$group": {"_id": "$main", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}},
+                {"$project": {"_id": 0, "condition": "$_id", "count": 1}},
+            ],
+            "temp_histogram": [
+                {"$bucket": {
+                    "groupBy": "$temp",
+                    "boundaries": TEMP_HISTOGRAM_BOUNDARIES,
+                    "default": "out_of_range",
+                    "output": {"count": {"$sum": 1}},
+                }},
+                {"$project": {"_id": 0, "min_temp": "$_id", "count": 1}},
+            ],
+        }},
+    ]
+
+def format_stats(result: dict) -> dict:
+    overall = result["overall"][0] if result["overall"] else None
+    for entry in [overall, *result["buckets"]]:
+        if entry and "temp_percentiles" in entry:
+            entry["temp_percentiles"] = {f"p{int(p * 100)}": value for p, value in zip(PERCENTILES, entry["temp_percentiles"])}
+    return {
+        "overall": overall,
+        "buckets": result["buckets"],
+        "conditions": result["conditions"],
+        "temp_histogram": result["temp_histogram"],
+    }
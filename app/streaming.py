@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+
+# Streams a Motor cursor to the client one batch at a time, so memory use is
+# bounded by the batch size rather than by the size of the result set.
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+async def _ndjson_chunks(cursor, batch_size: int) -> AsyncIterator[str]:
+    while batch := await cursor.to_list(length=batch_size):
+        yield "".join(json.dumps(doc, default=_json_default) + "\n" for doc in batch)
+
+async def _csv_chunks(cursor, batch_size: int, columns: List[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    while batch := await cursor.to_list(length=batch_size):
+        for doc in batch:
+            writer.writerow({column: _csv_value(doc.get(column)) for column in columns})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+class ChainedCursor:
+    # Reads several cursors one after the other through the same to_list()
+    # interface, e.g. the raw and hourly tiers of a history query
+    def __init__(self, cursors: List):
+        self._cursors = list(cursors)
+
+    def batch_size(self, batch_size: int) -> "ChainedCursor":
+        self._cursors = [cursor.batch_size(batch_size) for cursor in self._cursors]
+        return self
+
+    async def to_list(self, length: int) -> List[dict]:
+        while self._cursors:
+            batch = await self._cursors[0].to_list(length=length)
+            if batch:
+                return batch
+            self._cursors.pop(0)
+        return []
+
+def stream_cursor(cursor, fmt: str, batch_size: int, columns: List[str], filename: str) -> StreamingResponse:
+    cursor = cursor.batch_size(batch_size)
+    if fmt == "csv":
+        body = _csv_chunks(cursor, batch_size, columns)
+    else:
+        body = _ndjson_chunks(cursor, batch_size)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'inline; filename="{filename}.{fmt}"'},
+    )
@@ -1,132 +1,198 @@
 import asyncio
-from app.services import fetch_weather_data, create_notification
+import time
+from app.services import fetch_weather_data_batch, fetch_weather_data_individually, create_notification
 from app.config import config
-from motor.motor_asyncio import AsyncIOMotorClient
+from app.database import get_db
+from app.cache import weather_cache
+from app.cities import city_registry
+from app.alerts import alert_engine, describe
+from app.notifications import alert_writer, alert_cooldown
+from app.rollups import PENDING_FIELD, refresh_rollups
+from app.response_cache import response_cache
+from app.metrics import ALERTS_EMITTED, CYCLE_DURATION, READINGS_EVALUATED, RULES_FIRED, timed
 from datetime import datetime, timedelta
-from app.models import AlertThreshold, WeatherAlert, WeatherData, Notification
+from typing import Dict, List, Optional, Tuple
+from app.models import WeatherData
+from fastapi import HTTPException
 import logging
 
-# List of metro cities in India
-cities = ["Delhi", "Mumbai", "Chennai", "Bangalore", "Kolkata", "Hyderabad"]
-
-client = AsyncIOMotorClient(config.MONGO_URI)
-db = client.weather_app
-collection = db[config.WEATHER_COLLECTION]
-
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def calculate_daily_summary(city: str):
-    today = datetime.utcnow().date()
-    weather_entries = collection.find({
-        "city": city,
-        "timestamp": {
-            "$gte": datetime.combine(today, datetime.min.time()),
-            "$lt": datetime.combine(today + timedelta(days=1), datetime.min.time())
-        }
-    })
-
-    temps = []
-    conditions = {}
-    async for entry in weather_entries:
-        temps.append(entry['temp'])
-        condition = entry['main']
-        conditions[condition] = conditions.get(condition, 0) + 1
-
-    if not temps:
-        logger.info(f"No weather data available for {city} on {today}")
+def _summary_date(timestamp: datetime) -> str:
+    return timestamp.strftime("%Y-%m-%d")
+
+async def update_daily_summary(weather_data: WeatherData):
+    # Folds one reading into the running aggregates of its (city, date) summary.
+    # A single pipeline upsert applies the $inc/$min/$max-style updates and
+    # re-derives avg_temp and dominant_condition atomically, so concurrent
+    # writers never see a half-updated summary. A summary written before the
+    # running aggregates existed is seeded from its avg_temp and dominant
+    # condition first, the same way the rollups read it.
+    temp = weather_data.temp
+    condition_field = f"conditions.{weather_data.main}"
+    date = _summary_date(weather_data.timestamp)
+    await get_db()["daily_summaries"].update_one(
+        {"city": weather_data.city, "date": date},
+        [
+            {"$set": {
+                "sum_temp": {"$ifNull": ["$sum_temp", {"$multiply": [{"$ifNull": ["$avg_temp", 0]}, {"$ifNull": ["$total_entries", 0]}]}]},
+                "conditions": {"$ifNull": ["$conditions", {"$cond": [
+                    {"$eq": [{"$type": "$dominant_condition"}, "string"]},
+                    {"$arrayToObject": [[{"k": "$dominant_condition", "v": {"$ifNull": ["$total_entries", 0]}}]]},
+                    {},
+                ]}]},
+            }},
+            {"$set": {
+                "sum_temp": {"$add": ["$sum_temp", temp]},
+                "total_entries": {"$add": [{"$ifNull": ["$total_entries", 0]}, 1]},
+                "max_temp": {"$max": [{"$ifNull": ["$max_temp", temp]}, temp]},
+                "min_temp": {"$min": [{"$ifNull": ["$min_temp", temp]}, temp]},
+                condition_field: {"$add": [{"$ifNull": [f"${condition_field}", 0]}, 1]},
+                PENDING_FIELD: {"$add": [{"$ifNull": [f"${PENDING_FIELD}", 0]}, 1]},
+            }},
+            {"$set": {
+                "avg_temp": {"$divide": ["$sum_temp", "$total_entries"]},
+                "dominant_condition": {"$getField": {"field": "k", "input": {"$reduce": {
+                    "input": {"$objectToArray": "$conditions"},
+                    "initialValue": {"k": None, "v": 0},
+                    "in": {"$cond": [{"$gt": ["$$this.v", "$$value.v"]}, "$$this", "$$value"]},
+                }}}},
+            }},
+        ],
+        upsert=True
+    )
+
+@timed("calculate_daily_summary")
+async def calculate_daily_summary(city: str, date: Optional[str] = None):
+    # Full recomputation from raw readings. Ingestion keeps summaries current
+    # through update_daily_summary; this is only for repairs and backfills.
+    day = datetime.strptime(date, "%Y-%m-%d").date() if date else datetime.utcnow().date()
+    # Grouped server-side per condition over one day of the city's buckets, so
+    # only a handful of rows come back however many readings the day holds
+    groups = await get_db()[config.WEATHER_COLLECTION].aggregate([
+        {"$match": {
+            "city": city,
+            "timestamp": {
+                "$gte": datetime.combine(day, datetime.min.time()),
+                "$lt": datetime.combine(day + timedelta(days=1), datetime.min.time())
+            }
+        }},
+        {"$group": {
+            "_id": "$main",
+            "count": {"$sum": 1},
+            "sum_temp": {"$sum": "$temp"},
+            "max_temp": {"$max": "$temp"},
+            "min_temp": {"$min": "$temp"}
+        }}
+    ]).to_list(length=None)
+
+    if not groups:
+        logger.info(f"No weather data available for {city} on {day}")
         return
 
+    conditions = {group['_id']: group['count'] for group in groups}
+    total_entries = sum(conditions.values())
+    sum_temp = sum(group['sum_temp'] for group in groups)
     summary_data = {
-        "date": today.strftime("%Y-%m-%d"),
+        "date": day.strftime("%Y-%m-%d"),
         "city": city,
-        "avg_temp": sum(temps) / len(temps),
-        "max_temp": max(temps),
-        "min_temp": min(temps),
+        "avg_temp": sum_temp / total_entries,
+        "max_temp": max(group['max_temp'] for group in groups),
+        "min_temp": min(group['min_temp'] for group in groups),
         "dominant_condition": max(conditions, key=conditions.get),
-        "total_entries": len(temps)
+        "total_entries": total_entries,
+        "sum_temp": sum_temp,
+        "conditions": conditions
     }
 
     # Store the summary in a separate collection for daily summaries
-    summary_collection = db["daily_summaries"]
+    summary_collection = get_db()["daily_summaries"]
     await summary_collection.update_one(
         {"date": summary_data["date"], "city": city},
-        {"$set": summary_data},
+        {"$set": summary_data, "$inc": {PENDING_FIELD: 1}},
         upsert=True
     )
+    logger.info(f"Daily summary for {city} on {day} recalculated and stored.")
+
+@timed("check_alert_thresholds")
+async def check_alert_thresholds(readings: List[WeatherData]):
+    # Evaluates the whole batch against every threshold and rule in one pass,
+    # then emits one WeatherAlert and notification per (city, subscriber)
+    triggered = alert_engine.evaluate(readings)
+    READINGS_EVALUATED.inc(len(readings))
+    RULES_FIRED.inc(len(triggered))
+    fired = [match for match in triggered if alert_cooldown.allow(match.weather_data.city, match.rule.id)]
+    if not fired:
+        logger.info(f"No alerts triggered for {len(readings)} readings")
+        return
 
-    logger.info(f"Daily summary for {city} on {today} calculated and stored.")
+    grouped: Dict[Tuple[str, Optional[str]], List] = {}
+    for rule, weather_data in fired:
+        grouped.setdefault((weather_data.city, rule.subscriber), []).append((rule, weather_data))
 
-async def check_alert_thresholds(weather_data: WeatherData):
+    now = datetime.utcnow()
+    ALERTS_EMITTED.inc(len(grouped))
+    for (city, subscriber), matches in grouped.items():
+        alerts = [describe(rule, weather_data) for rule, weather_data in matches]
+        weather_data = matches[-1][1]
+        alert_message = f"ALERT for {city}: {', '.join(alerts)}"
+        logger.warning(alert_message)
+
+        alert_writer.submit({"city": city, "subscriber": subscriber, "alerts": alerts, "timestamp": now})
+        try:
+            await create_notification({
+                "city": city,
+                "message": alert_message[:500],
+                "timestamp": now,
+                "subscriber": subscriber,
+                "weather_data": weather_data,
+            })
+        except HTTPException as he:
+            # Shed by the writer (already counted and logged); keep emitting the rest
+            if he.status_code != 503:
+                raise
+
+async def fetch_cycle_readings(cities: List[str]) -> List[WeatherData]:
+    if config.USE_GROUP_ENDPOINT:
+        return await fetch_weather_data_batch(cities)
+
+    return await fetch_weather_data_individually(cities)
+
+async def process_reading(weather_data: WeatherData):
+    city = weather_data.city
     try:
-        threshold = await db["alert_thresholds"].find_one({"city": weather_data.city})
-        
-        if not threshold:
-            logger.info(f"No alert thresholds set for {weather_data.city}")
-            return
-
-        alert_threshold = AlertThreshold(**threshold)
-        alerts = []
-
-        if alert_threshold.max_temp and weather_data.temp > alert_threshold.max_temp:
-            alerts.append(f"High temperature alert: {weather_data.temp:.1f}°C exceeds threshold of {alert_threshold.max_temp}°C")
-        
-        if alert_threshold.min_temp and weather_data.temp < alert_threshold.min_temp:
-            alerts.append(f"Low temperature alert: {weather_data.temp:.1f}°C is below threshold of {alert_threshold.min_temp}°C")
-
-        if alert_threshold.weather_condition and weather_data.main == alert_threshold.weather_condition:
-            alerts.append(f"Weather condition alert: {weather_data.main} matches alert condition")
-
-        if alerts:
-            alert_message = f"ALERT for {weather_data.city}: {', '.join(alerts)}"
-            logger.warning(alert_message)
-            
-            notification = Notification(
-                city=weather_data.city,
-                message=alert_message,
-                timestamp=datetime.utcnow(),
-                weather_data=weather_data
-            )
-            await create_notification(notification.dict())
-        else:
-            logger.info(f"No alerts triggered for {weather_data.city}. Current temp: {weather_data.temp:.1f}°C, Condition: {weather_data.main}")
-    
+        # Readings are append-only: every cycle adds a new document to the time-series collection
+        await get_db()[config.WEATHER_COLLECTION].insert_one(weather_data.dict())
+        logger.info(f"Stored weather reading for {city}")
+        weather_cache.put(weather_data)
+
+        # Fold the reading into today's running summary
+        await update_daily_summary(weather_data)
+
+    except Exception as e:
+        logger.error(f"Error processing weather data for {city}: {str(e)}", exc_info=True)
+
+async def start_weather_monitoring(cities: Optional[List[str]] = None):
+    # Runs one ingestion cycle (repeated by the scheduler in main.py): the given
+    # cities (by default every registered city) are fetched concurrently over the
+    # shared HTTP pool (batched through /group when enabled), stored in parallel,
+    # and then evaluated against all alert rules as one batch
+    started = time.perf_counter()
+    if cities is None:
+        cities = city_registry.names()
+    readings = await fetch_cycle_readings(cities)
+    await asyncio.gather(*(process_reading(weather_data) for weather_data in readings))
+    try:
+        await check_alert_thresholds(readings)
     except Exception as e:
-        logger.error(f"Error checking alert thresholds for {weather_data.city}: {str(e)}", exc_info=True)
+        logger.error(f"Error checking alert thresholds: {str(e)}", exc_info=True)
 
-async def start_weather_monitoring():
-    # This function will now run once per invocation
-    for city in ["Delhi", "Mumbai", "Chennai", "Bangalore", "Kolkata", "Hyderabad"]:
-        try:
-            weather_data = await fetch_weather_data(city)
-            collection = db[config.WEATHER_COLLECTION]
-            
-            # Convert WeatherData to dictionary
-            weather_dict = weather_data.dict()
-            
-            # Update the document for this city, or insert if it doesn't exist
-            result = await collection.update_one(
-                {"city": city},
-                {"$set": weather_dict},
-                upsert=True
-            )
-
-            if result.modified_count > 0:
-                logger.info(f"Updated weather data for {city}")
-            elif result.upserted_id:
-                logger.info(f"Inserted new weather data for {city}")
-            else:
-                logger.info(f"No changes to weather data for {city}")
-
-            # Check alert thresholds
-            await check_alert_thresholds(weather_data)
-            
-            # Calculate daily summary
-            await calculate_daily_summary(city)
-            
-        except Exception as e:
-            logger.error(f"Error processing weather data for {city}: {str(e)}", exc_info=True)
-
-    # Note: In a serverless environment, this sleep won't work as intended
-    # You'll need to set up a separate mechanism for periodic invocation
-    logger.info("Weather monitoring cycle completed. In a non-serverless environment, would wait 5 minutes before next cycle.")
+    try:
+        await refresh_rollups()
+    except Exception as e:
+        logger.error(f"Error refreshing summary rollups: {str(e)}", exc_info=True)
+    response_cache.invalidate()
+
+    elapsed = time.perf_counter() - started
+    CYCLE_DURATION.observe(elapsed)
+    logger.info(f"Weather monitoring cycle completed in {elapsed:.2f}s for {len(readings)}/{len(cities)} cities")
@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional
+from app.collection_index import CollectionIndex
+from app.config import config
+from app.models import AlertThreshold, AlertRule
+
+# alert_thresholds keyed by city
+class ThresholdIndex(CollectionIndex):
+    name = "alert thresholds"
+
+    def _parse(self, doc: dict) -> AlertThreshold:
+        return AlertThreshold(**doc)
+
+    def _key(self, threshold: AlertThreshold) -> str:
+        return threshold.city
+
+    def get(self, city: str) -> Optional[AlertThreshold]:
+        return self._items.get(city)
+
+    def set(self, threshold: AlertThreshold):
+        current = self._items.get(threshold.city)
+        if current is not None:
+            # /set-alert-threshold writes with exclude_unset, so merge like the $set does
+            threshold = current.copy(update=threshold.dict(exclude_unset=True))
+        self._put(threshold)
+
+# alert_rules keyed by rule id, with a per-city lookup for the rules API
+class RuleIndex(CollectionIndex):
+    name = "alert rules"
+
+    def __init__(self, refresh_interval: float):
+        super().__init__(refresh_interval)
+        self._by_city: Dict[str, Dict[str, AlertRule]] = {}
+
+    def _parse(self, doc: dict) -> AlertRule:
+        # Leaves doc intact so _parse_or_skip can log its _id if validation fails
+        fields = {key: value for key, value in doc.items() if key != '_id'}
+        return AlertRule(id=str(doc['_id']), **fields)
+
+    def _key(self, rule: AlertRule) -> str:
+        return rule.id
+
+    def _changed(self):
+        # Only load() gets here: single-rule changes update their city's bucket in _put/remove
+        by_city: Dict[str, Dict[str, AlertRule]] = {}
+        for rule in self._items.values():
+            by_city.setdefault(rule.city, {})[rule.id] = rule
+        self._by_city = by_city
+
+    def _unindex(self, key: str):
+        previous = self._items.get(key)
+        if previous is not None:
+            bucket = self._by_city.get(previous.city)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._by_city[previous.city]
+
+    def _put(self, rule: AlertRule):
+        key = self._key(rule)
+        self._unindex(key)
+        self._items[key] = rule
+        self._by_city.setdefault(rule.city, {})[key] = rule
+        self.version += 1
+
+    def remove(self, key: str):
+        self._unindex(key)
+        if self._items.pop(key, None) is not None:
+            self.version += 1
+
+    def for_city(self, city: str) -> List[AlertRule]:
+        return list(self._by_city.get(city, {}).values())
+
+    def set(self, rule: AlertRule):
+        self._put(rule)
+
+threshold_index = ThresholdIndex(config.THRESHOLD_REFRESH_SECONDS)
+rule_index = RuleIndex(config.THRESHOLD_REFRESH_SECONDS)
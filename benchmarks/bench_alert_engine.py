@@ -0,0 +1,78 @@
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from app.alerts import AlertEngine
+from app.models import AlertRule, WeatherData
+from app.thresholds import ThresholdIndex, RuleIndex
+
+# Compiles N random rules and evaluates batches of readings against them.
+#   python -m benchmarks.bench_alert_engine --rules 100000 --cycles 50
+
+CITIES = ["Delhi", "Mumbai", "Chennai", "Bangalore", "Kolkata", "Hyderabad"]
+CONDITIONS = ["Clear", "Clouds", "Rain", "Haze", "Mist", "Thunderstorm"]
+
+def make_rules(count: int, rng: random.Random):
+    rules = []
+    for i in range(count):
+        metric = rng.choice(["temp", "feels_like", "condition"])
+        if metric == "condition":
+            rule = AlertRule(id=str(i), city=rng.choice(CITIES), subscriber=f"user{i % 5000}", metric=metric,
+                             weather_condition=rng.choice(CONDITIONS), consecutive_readings=rng.randint(1, 3))
+        else:
+            rule = AlertRule(id=str(i), city=rng.choice(CITIES), subscriber=f"user{i % 5000}", metric=metric,
+                             operator=rng.choice(["gt", "lt"]), value=rng.uniform(0, 45),
+                             consecutive_readings=rng.randint(1, 3))
+        rules.append(rule)
+    return rules
+
+def make_readings(rng: random.Random):
+    return [
+        WeatherData(city=city, main=rng.choice(CONDITIONS), temp=rng.uniform(5, 45),
+                    feels_like=rng.uniform(5, 48), timestamp=datetime.utcnow())
+        for city in CITIES
+    ]
+
+def run(rule_count: int, cycles: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    rules = make_rules(rule_count, rng)
+    rule_index = RuleIndex(60)
+    for rule in rules:
+        rule_index.set(rule)
+    engine = AlertEngine(ThresholdIndex(60), rule_index)
+
+    started = time.perf_counter()
+    engine.refresh()
+    compile_seconds = time.perf_counter() - started
+
+    batches = [make_readings(rng) for _ in range(cycles)]
+    fired = 0
+    timings = []
+    for readings in batches:
+        started = time.perf_counter()
+        fired += len(engine.evaluate(readings))
+        timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    return {
+        "benchmark": "alert_engine",
+        "rules": rule_count,
+        "readings_per_cycle": len(CITIES),
+        "cycles": cycles,
+        "compile_ms": compile_seconds * 1000,
+        "evaluate_ms_p50": timings[len(timings) // 2] * 1000,
+        "evaluate_ms_max": timings[-1] * 1000,
+        "alerts_fired": fired,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_alert_engine")
+    parser.add_argument("--rules", type=int, default=100_000)
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rules, args.cycles, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
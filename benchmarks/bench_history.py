@@ -0,0 +1,59 @@
+import time
+from datetime import datetime, timedelta
+from typing import List
+from benchmarks.harness import CONDITIONS, asgi_client, execute, int_list, parser, percentiles, reset_database
+
+# /weather-history/{city} latency against the number of readings in the range.
+#   python -m benchmarks.bench_history --sizes 1000,10000,100000 --requests 20
+
+INSERT_BATCH = 10_000
+
+async def seed_readings(city: str, count: int, days: int):
+    from app.config import config
+    from app.database import get_db
+    now = datetime.utcnow()
+    step = timedelta(days=days) / count
+    docs = [{
+        "city": city,
+        "main": CONDITIONS[i % len(CONDITIONS)],
+        "temp": 20 + i % 15,
+        "feels_like": 21 + i % 15,
+        "timestamp": now - step * i,
+    } for i in range(count)]
+    for i in range(0, count, INSERT_BATCH):
+        await get_db()[config.WEATHER_COLLECTION].insert_many(docs[i:i + INSERT_BATCH], ordered=False)
+
+async def run(sizes: List[int], requests: int) -> List[dict]:
+    from app.config import config
+    results = []
+    async with asgi_client() as client:
+        for size in sizes:
+            await reset_database()
+            await seed_readings("Delhi", size, config.HISTORY_DEFAULT_DAYS)
+            for path in ("/weather-history/Delhi", "/weather-history/Delhi/stream"):
+                timings = []
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    response = await client.get(path)
+                    body = response.content
+                    timings.append(time.perf_counter() - started)
+                    response.raise_for_status()
+                results.append({
+                    "benchmark": "weather_history",
+                    "endpoint": path.replace("Delhi", "{city}"),
+                    "readings": size,
+                    "requests": requests,
+                    "response_bytes": len(body),
+                    **percentiles(timings),
+                })
+    return results
+
+def main():
+    args_parser = parser("python -m benchmarks.bench_history")
+    args_parser.add_argument("--sizes", type=int_list, default=[1_000, 10_000, 100_000])
+    args_parser.add_argument("--requests", type=int, default=20)
+    args = args_parser.parse_args()
+    execute(args, [lambda: run(args.sizes, args.requests)])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import time
+from typing import List
+from benchmarks.harness import execute, int_list, parser, reset_database
+
+# Ingestion cycle time against the number of cities polled, and how it divides
+# across sharded workers.
+#   python -m benchmarks.bench_ingestion --cities 6,60,600,1000 --workers 1,2,4 --cycles 3
+#
+# Synthetic cities are registered in memory with distinct OpenWeatherMap IDs, so
+# the fake upstream serves them through /group like real ones. For W workers the
+# shards are assigned as the ShardCoordinator would, and each worker's slice is
+# run as its own cycle; workers are separate processes with their own pools, so
+# the sharded cycle time is that of the busiest slice.
+
+SHARD_COUNT = 64
+
+def worker_slices(cities: List[str], workers: int) -> List[List[str]]:
+    from app.sharding import HashRing, shard_of
+    members = [f"bench-worker-{i}" for i in range(workers)]
+    assignment = HashRing(members).assign([f"shard:{shard}" for shard in range(SHARD_COUNT)])
+    return [[city for city in cities if assignment[f"shard:{shard_of(city, SHARD_COUNT)}"] == member]
+            for member in members]
+
+async def run(city_counts: List[int], worker_counts: List[int], cycles: int) -> List[dict]:
+    from app import tasks
+    from app.cities import CityEntry, city_registry
+    from app.config import config
+    from app.database import get_db
+
+    names = [f"Bench City {i:04d}" for i in range(max(city_counts))]
+    for i, name in enumerate(names):
+        city_registry.set(CityEntry(name, 9_000_000 + i))
+
+    results = []
+    for count in city_counts:
+        for workers in worker_counts:
+            await reset_database()
+            slices = worker_slices(names[:count], workers)
+            timings = []
+            for _ in range(cycles):
+                slice_timings = []
+                for cities in slices:
+                    started = time.perf_counter()
+                    await tasks.start_weather_monitoring(cities)
+                    slice_timings.append(time.perf_counter() - started)
+                timings.append(max(slice_timings))
+            stored = await get_db()[config.WEATHER_COLLECTION].count_documents({})
+            results.append({
+                "benchmark": "ingestion_cycle",
+                "cities": count,
+                "workers": workers,
+                "largest_slice": max(len(cities) for cities in slices),
+                "cycles": cycles,
+                "cycle_ms_mean": 1000 * sum(timings) / len(timings),
+                "cycle_ms_max": 1000 * max(timings),
+                "cities_per_second": count / (sum(timings) / len(timings)),
+                "readings_stored": stored,
+            })
+    return results
+
+def main():
+    args_parser = parser("python -m benchmarks.bench_ingestion")
+    args_parser.add_argument("--cities", type=int_list, default=[6, 60, 600, 1000])
+    args_parser.add_argument("--workers", type=int_list, default=[1])
+    args_parser.add_argument("--cycles", type=int, default=3)
+    args = args_parser.parse_args()
+    execute(args, [lambda: run(args.cities, args.workers, args.cycles)])
+
+if __name__ == "__main__":
+    main()
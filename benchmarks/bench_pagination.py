@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timedelta
+from typing import List
+from benchmarks.harness import asgi_client, execute, int_list, parser, percentiles, reset_database
+
+# Latency of one /notifications/{city} page at increasing depth, paging with the
+# `after` cursor versus the deprecated `offset`.
+#   python -m benchmarks.bench_pagination --notifications 100000 --depths 0,1000,10000,90000
+
+INSERT_BATCH = 10_000
+PAGE_SIZE = 100
+
+async def seed_notifications(city: str, count: int):
+    from app.database import get_db
+    now = datetime.utcnow()
+    reading = {"city": city, "main": "Clear", "temp": 30.0, "feels_like": 31.0, "timestamp": now}
+    docs = [{
+        "city": city,
+        "message": f"ALERT for {city}: High temperature alert",
+        "timestamp": now - timedelta(seconds=i),
+        "is_read": False,
+        "subscriber": f"user{i % 100}",
+        "weather_data": reading,
+    } for i in range(count)]
+    for i in range(0, count, INSERT_BATCH):
+        await get_db()["notifications"].insert_many(docs[i:i + INSERT_BATCH], ordered=False)
+
+async def cursor_at(client, path: str, depth: int) -> str:
+    # Walks to `depth` rows with the largest pages the API allows, returning the cursor there
+    after = None
+    for _ in range(depth // PAGE_SIZE):
+        params = {"limit": PAGE_SIZE}
+        if after:
+            params["after"] = after
+        after = (await client.get(path, params=params)).json()["next_cursor"]
+    return after
+
+async def run(notifications: int, depths: List[int], requests: int) -> List[dict]:
+    results = []
+    path = "/notifications/Delhi"
+    async with asgi_client() as client:
+        await reset_database()
+        await seed_notifications("Delhi", notifications)
+        for depth in depths:
+            after = await cursor_at(client, path, depth)
+            for mode, params in (("keyset", {"limit": PAGE_SIZE, **({"after": after} if after else {})}),
+                                 ("offset", {"limit": PAGE_SIZE, "offset": depth})):
+                timings = []
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    response = await client.get(path, params=params)
+                    timings.append(time.perf_counter() - started)
+                    response.raise_for_status()
+                results.append({
+                    "benchmark": "notification_pagination",
+                    "mode": mode,
+                    "notifications": notifications,
+                    "depth": depth,
+                    "page_size": PAGE_SIZE,
+                    "requests": requests,
+                    **percentiles(timings),
+                })
+    return results
+
+def main():
+    args_parser = parser("python -m benchmarks.bench_pagination")
+    args_parser.add_argument("--notifications", type=int, default=100_000)
+    args_parser.add_argument("--depths", type=int_list, default=[0, 1_000, 10_000, 90_000])
+    args_parser.add_argument("--requests", type=int, default=20)
+    args = args_parser.parse_args()
+    execute(args, [lambda: run(args.notifications, args.depths, args.requests)])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+from benchmarks.harness import CONDITIONS, asgi_client, execute, int_list, parser, percentiles, reset_database
+from benchmarks.bench_pagination import seed_notifications
+
+# Concurrent read throughput of a mix of API reads, driven in-process through
+# the ASGI app (no network or server overhead), at increasing concurrency.
+#   python -m benchmarks.bench_read_throughput --concurrency 1,10,50,100 --duration 10
+
+CITIES = ["Delhi", "Mumbai", "Chennai", "Bangalore", "Kolkata", "Hyderabad"]
+SUMMARY_DAYS = 30
+
+def read_paths() -> List[str]:
+    paths = ["/cities", "/notifications?limit=20"]
+    for city in CITIES:
+        paths += [f"/weather/{city}", f"/summaries/{city}/", f"/notifications/{city}?limit=20"]
+    return paths
+
+async def seed():
+    from app.cache import weather_cache
+    from app.database import get_db
+    from app.models import WeatherData
+
+    today = datetime.utcnow().date()
+    summaries = [{
+        "city": city,
+        "date": (today - timedelta(days=day)).strftime("%Y-%m-%d"),
+        "avg_temp": 25.0, "max_temp": 30.0, "min_temp": 20.0,
+        "dominant_condition": CONDITIONS[day % len(CONDITIONS)], "total_entries": 288,
+    } for city in CITIES for day in range(SUMMARY_DAYS)]
+    await get_db()["daily_summaries"].insert_many(summaries)
+    for city in CITIES:
+        await seed_notifications(city, 1_000)
+        # Current weather is served from the cache the ingestion cycle fills
+        weather_cache.put(WeatherData(city=city, main="Clear", temp=25.0, feels_like=26.0, timestamp=datetime.utcnow()))
+
+async def drive(client, paths: List[str], concurrency: int, duration: float) -> dict:
+    timings: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(offset: int):
+        nonlocal errors
+        i = offset
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(paths[i % len(paths)])
+            timings.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            i += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"requests": len(timings), "errors": errors, "requests_per_second": len(timings) / elapsed, **percentiles(timings)}
+
+async def run(concurrency_levels: List[int], duration: float) -> List[dict]:
+    await reset_database()
+    await seed()
+    paths = read_paths()
+    results = []
+    async with asgi_client() as client:
+        for concurrency in concurrency_levels:
+            results.append({
+                "benchmark": "read_throughput",
+                "concurrency": concurrency,
+                "duration_seconds": duration,
+                "endpoints": len(paths),
+                **await drive(client, paths, concurrency, duration),
+            })
+    return results
+
+def main():
+    args_parser = parser("python -m benchmarks.bench_read_throughput")
+    args_parser.add_argument("--concurrency", type=int_list, default=[1, 10, 50, 100])
+    args_parser.add_argument("--duration", type=float, default=10)
+    args = args_parser.parse_args()
+    execute(args, [lambda: run(args.concurrency, args.duration)])
+
+if __name__ == "__main__":
+    main()
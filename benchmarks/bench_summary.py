@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timedelta
+from typing import List
+from benchmarks.harness import CONDITIONS, execute, int_list, parser, percentiles, reset_database
+
+# Cost of daily summaries against the number of readings per day: the full
+# recomputation (calculate_daily_summary) and the per-reading incremental update
+# done during ingestion (update_daily_summary).
+#   python -m benchmarks.bench_summary --readings 100,1000,10000 --repeats 10
+
+INSERT_BATCH = 10_000
+INCREMENTAL_SAMPLES = 200
+
+def day_readings(city: str, day: datetime, count: int) -> List[dict]:
+    step = timedelta(days=1) / count
+    return [{
+        "city": city,
+        "main": CONDITIONS[i % len(CONDITIONS)],
+        "temp": 20 + i % 15,
+        "feels_like": 21 + i % 15,
+        "timestamp": day + step * i,
+    } for i in range(count)]
+
+async def run(readings_per_day: List[int], repeats: int) -> List[dict]:
+    from app.config import config
+    from app.database import get_db
+    from app.models import WeatherData
+    from app.tasks import calculate_daily_summary, update_daily_summary
+
+    day = datetime.combine(datetime.utcnow().date() - timedelta(days=1), datetime.min.time())
+    date = day.strftime("%Y-%m-%d")
+    results = []
+    for count in readings_per_day:
+        await reset_database()
+        docs = day_readings("Delhi", day, count)
+        for i in range(0, count, INSERT_BATCH):
+            await get_db()[config.WEATHER_COLLECTION].insert_many(docs[i:i + INSERT_BATCH], ordered=False)
+
+        full = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            await calculate_daily_summary("Delhi", date)
+            full.append(time.perf_counter() - started)
+
+        # Folding further readings into the now-populated summary
+        incremental = []
+        for doc in day_readings("Delhi", day, INCREMENTAL_SAMPLES):
+            weather_data = WeatherData(**doc)
+            started = time.perf_counter()
+            await update_daily_summary(weather_data)
+            incremental.append(time.perf_counter() - started)
+
+        results.append({"benchmark": "daily_summary", "mode": "recompute", "readings_per_day": count,
+                        "samples": repeats, **percentiles(full)})
+        results.append({"benchmark": "daily_summary", "mode": "incremental", "readings_per_day": count,
+                        "samples": INCREMENTAL_SAMPLES, **percentiles(incremental)})
+    return results
+
+def main():
+    args_parser = parser("python -m benchmarks.bench_summary")
+    args_parser.add_argument("--readings", type=int_list, default=[100, 1_000, 10_000])
+    args_parser.add_argument("--repeats", type=int, default=10)
+    args = args_parser.parse_args()
+    execute(args, [lambda: run(args.readings, args.repeats)])
+
+if __name__ == "__main__":
+    main()
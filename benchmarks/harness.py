@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Shared pieces of the Mongo/HTTP benchmarks: a stand-in OpenWeatherMap server, a
+# throwaway mongod, and helpers to point the app at both and report timings.
+#
+# The app relies on time-series collections, pipeline updates and $merge, which
+# mongomock does not implement, so the benchmarks run against a real mongod: a
+# temporary one started from `mongod` on PATH, or an existing server passed with
+# --mongo-uri (a fresh database is created on it and dropped afterwards).
+
+CONDITIONS = ["Clear", "Clouds", "Rain", "Haze", "Mist", "Thunderstorm"]
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _weather_body(index: int, city_id: Optional[int] = None) -> dict:
+    body = {
+        "weather": [{"main": CONDITIONS[index % len(CONDITIONS)]}],
+        "main": {"temp": 290 + index % 20, "feels_like": 291 + index % 20},
+    }
+    if city_id is not None:
+        body["id"] = city_id
+    return body
+
+class FakeOpenWeatherMap:
+    # Serves /weather and /group in the OpenWeatherMap response format after a
+    # fixed delay, and counts the requests it received
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.requests += 1
+                time.sleep(fake.latency)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.endswith("/group"):
+                    ids = [int(city_id) for city_id in query["id"][0].split(",")]
+                    body = {"cnt": len(ids), "list": [_weather_body(i, city_id) for i, city_id in enumerate(ids)]}
+                else:
+                    body = _weather_body(fake.requests)
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", _free_port()), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self) -> "FakeOpenWeatherMap":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+@contextmanager
+def temporary_mongod() -> Iterator[str]:
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        raise SystemExit("mongod not found on PATH; install MongoDB or pass --mongo-uri")
+    dbpath = tempfile.mkdtemp(prefix="weather-bench-")
+    port = _free_port()
+    process = subprocess.Popen(
+        [mongod, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    uri = f"mongodb://127.0.0.1:{port}"
+    try:
+        _wait_for_mongo(uri)
+        yield uri
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+def _wait_for_mongo(uri: str, timeout: float = 30):
+    from pymongo import MongoClient
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with MongoClient(uri, serverSelectionTimeoutMS=500) as client:
+                client.admin.command("ping")
+            return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+
+@contextmanager
+def mongo(uri: Optional[str]) -> Iterator[str]:
+    if uri:
+        yield uri
+    else:
+        with temporary_mongod() as temporary_uri:
+            yield temporary_uri
+
+def configure_app(mongo_uri: str, upstream_url: str, db_name: str):
+    # Must run before the app's startup: the shared Mongo client is created on first use
+    from app.config import config
+    from app.database import close_client
+    config.MONGO_URI = mongo_uri
+    config.MONGO_DB_NAME = db_name
+    config.OPENWEATHERMAP_BASE_URL = upstream_url
+    config.OPENWEATHERMAP_API_KEY = "bench"
+    close_client()
+
+async def reset_database():
+    # Fresh collections and indexes, as the app's startup creates them
+    from app.database import ensure_collections, ensure_indexes, get_client, get_db
+    from app.config import config
+    await get_client().drop_database(config.MONGO_DB_NAME)
+    await ensure_collections(get_db())
+    await ensure_indexes(get_db())
+
+def percentiles(timings: List[float]) -> dict:
+    ordered = sorted(timings)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"ms_p50": pick(0.50), "ms_p95": pick(0.95), "ms_p99": pick(0.99), "ms_max": ordered[-1] * 1000}
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def write_results(results: List[dict], output: Optional[str], started_at: datetime):
+    # One JSON document per run, so two runs can be diffed field by field
+    report = {
+        "commit": git_commit(),
+        "started_at": started_at.isoformat(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+def parser(prog: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument("--mongo-uri", help="Use this server instead of a temporary mongod")
+    parser.add_argument("--upstream-latency", type=float, default=0.02, help="Fake OpenWeatherMap delay in seconds")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    return parser
+
+def execute(args: argparse.Namespace, benchmarks: List[Callable[[], Awaitable[List[dict]]]]):
+    # Runs the benchmarks against a fake upstream and a scratch database, then reports
+    started_at = datetime.utcnow()
+    with mongo(args.mongo_uri) as uri, FakeOpenWeatherMap(args.upstream_latency) as upstream:
+        configure_app(uri, upstream.url, f"weather_bench_{os.getpid()}")
+        results = asyncio.run(_run_all(benchmarks))
+    write_results(results, args.output, started_at)
+
+async def _run_all(benchmarks: List[Callable[[], Awaitable[List[dict]]]]) -> List[dict]:
+    from app.config import config
+    from app.database import close_client, get_client
+    from app.services import close_http_client
+    results = []
+    try:
+        for benchmark in benchmarks:
+            results.extend(await benchmark())
+    finally:
+        await get_client().drop_database(config.MONGO_DB_NAME)
+        await close_http_client()
+        close_client()
+    return results
+
+def asgi_client():
+    import httpx
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+def int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",")]
@@ -0,0 +1,37 @@
+from benchmarks import bench_history, bench_ingestion, bench_pagination, bench_read_throughput, bench_summary
+from benchmarks.harness import execute, parser
+
+# Runs every Mongo/HTTP benchmark in one go and writes a single JSON report.
+#   python -m benchmarks.suite --output bench-results/$(git rev-parse --short HEAD).json
+#   python -m benchmarks.suite --quick    # smaller sizes, for a smoke run
+
+FULL = {
+    "ingestion": ([6, 60, 600, 1000], [1, 2, 4], 3),
+    "history": ([1_000, 10_000, 100_000], 20),
+    "pagination": (100_000, [0, 1_000, 10_000, 90_000], 20),
+    "summary": ([100, 1_000, 10_000], 10),
+    "read_throughput": ([1, 10, 50, 100], 10),
+}
+QUICK = {
+    "ingestion": ([6, 60], [1, 2], 2),
+    "history": ([1_000, 10_000], 5),
+    "pagination": (10_000, [0, 1_000, 9_000], 5),
+    "summary": ([100, 1_000], 3),
+    "read_throughput": ([1, 10], 2),
+}
+
+def main():
+    args_parser = parser("python -m benchmarks.suite")
+    args_parser.add_argument("--quick", action="store_true")
+    args = args_parser.parse_args()
+    params = QUICK if args.quick else FULL
+    execute(args, [
+        lambda: bench_ingestion.run(*params["ingestion"]),
+        lambda: bench_history.run(*params["history"]),
+        lambda: bench_pagination.run(*params["pagination"]),
+        lambda: bench_summary.run(*params["summary"]),
+        lambda: bench_read_throughput.run(*params["read_throughput"]),
+    ])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+from datetime import datetime
+import app.collection_index as collection_index
+from app.alerts import AlertEngine
+from app.models import AlertRule, AlertThreshold, WeatherData
+from app.thresholds import RuleIndex, ThresholdIndex
+
+def reading(city: str, temp: float, main: str = "Clear") -> WeatherData:
+    return WeatherData(city=city, main=main, temp=temp, feels_like=temp, timestamp=datetime.utcnow())
+
+def engine(*rules: AlertRule) -> AlertEngine:
+    index = RuleIndex(60)
+    for rule in rules:
+        index.set(rule)
+    return AlertEngine(ThresholdIndex(60), index)
+
+def fired_ids(engine: AlertEngine, *readings: WeatherData):
+    return [match.rule.id for match in engine.evaluate(list(readings))]
+
+def test_rule_fires_once_its_streak_is_reached():
+    alerts = engine(AlertRule(id="hot", city="Delhi", metric="temp", operator="gt", value=40, consecutive_readings=3))
+    assert fired_ids(alerts, reading("Delhi", 45)) == []
+    assert fired_ids(alerts, reading("Delhi", 45)) == []
+    assert fired_ids(alerts, reading("Delhi", 45)) == ["hot"]
+    # A persisting condition does not fire again on every cycle
+    assert fired_ids(alerts, reading("Delhi", 45)) == []
+
+def test_broken_streak_starts_over():
+    alerts = engine(AlertRule(id="hot", city="Delhi", metric="temp", operator="gt", value=40, consecutive_readings=2))
+    assert fired_ids(alerts, reading("Delhi", 45)) == []
+    assert fired_ids(alerts, reading("Delhi", 30)) == []
+    assert fired_ids(alerts, reading("Delhi", 45)) == []
+    assert fired_ids(alerts, reading("Delhi", 45)) == ["hot"]
+
+def test_streak_is_kept_for_cycles_without_a_reading():
+    alerts = engine(AlertRule(id="hot", city="Delhi", metric="temp", operator="gt", value=40, consecutive_readings=2))
+    assert fired_ids(alerts, reading("Delhi", 45)) == []
+    assert fired_ids(alerts, reading("Mumbai", 45)) == []
+    assert fired_ids(alerts, reading("Delhi", 45)) == ["hot"]
+
+def test_readings_for_one_city_in_a_batch_count_in_order():
+    alerts = engine(AlertRule(id="hot", city="Delhi", metric="temp", operator="gt", value=40, consecutive_readings=2))
+    assert fired_ids(alerts, reading("Delhi", 45), reading("Delhi", 45)) == ["hot"]
+
+def test_rules_only_see_their_own_city():
+    alerts = engine(
+        AlertRule(id="delhi-cold", city="Delhi", metric="temp", operator="lt", value=5),
+        AlertRule(id="mumbai-rain", city="Mumbai", metric="condition", weather_condition="Rain"),
+    )
+    assert fired_ids(alerts, reading("Delhi", 2, "Rain"), reading("Mumbai", 2, "Rain")) == ["delhi-cold", "mumbai-rain"]
+
+def test_streaks_survive_recompilation():
+    rules = RuleIndex(60)
+    rules.set(AlertRule(id="hot", city="Delhi", metric="temp", operator="gt", value=40, consecutive_readings=2))
+    alerts = AlertEngine(ThresholdIndex(60), rules)
+    assert fired_ids(alerts, reading("Delhi", 45)) == []
+    rules.set(AlertRule(id="cold", city="Delhi", metric="temp", operator="lt", value=0))
+    assert fired_ids(alerts, reading("Delhi", 45)) == ["hot"]
+
+def test_thresholds_compile_to_single_reading_rules():
+    thresholds = ThresholdIndex(60)
+    thresholds.set(AlertThreshold(city="Delhi", max_temp=40, weather_condition="Haze"))
+    alerts = AlertEngine(thresholds, RuleIndex(60))
+    assert fired_ids(alerts, reading("Delhi", 45, "Haze")) == ["threshold:Delhi:max_temp", "threshold:Delhi:condition"]
+
+def test_rule_index_moves_and_removes_rules_by_city():
+    rules = RuleIndex(60)
+    rules.set(AlertRule(id="a", city="Delhi", metric="temp", operator="gt", value=40))
+    rules.set(AlertRule(id="b", city="Delhi", metric="temp", operator="lt", value=0))
+    rules.set(AlertRule(id="a", city="Mumbai", metric="temp", operator="gt", value=40))
+    assert [rule.id for rule in rules.for_city("Delhi")] == ["b"]
+    assert [rule.id for rule in rules.for_city("Mumbai")] == ["a"]
+    rules.remove("b")
+    rules.remove("missing")
+    assert rules.for_city("Delhi") == []
+    assert [rule.id for rule in rules.all()] == ["a"]
+
+def test_invalid_rule_is_logged_with_its_id(monkeypatch):
+    errors = []
+    monkeypatch.setattr(collection_index.logger, "error", errors.append)
+    assert RuleIndex(60)._parse_or_skip({"_id": "bad-rule", "city": "Delhi", "metric": "temp", "operator": "between"}) is None
+    assert "bad-rule" in errors[0]
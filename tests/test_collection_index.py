@@ -0,0 +1,133 @@
+import asyncio
+from typing import List, Optional
+from app.collection_index import CollectionIndex
+
+class ValueIndex(CollectionIndex):
+    name = "values"
+
+    def _parse(self, doc: dict) -> tuple:
+        return doc["_id"], doc["value"]
+
+    def _key(self, item: tuple) -> str:
+        return item[0]
+
+    def get(self, key: str) -> Optional[int]:
+        item = self._items.get(key)
+        return item[1] if item else None
+
+class FakeStream:
+    def __init__(self, changes: asyncio.Queue):
+        self.changes = changes
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        change = await self.changes.get()
+        if isinstance(change, Exception):
+            raise change
+        return change
+
+# Just enough of a Motor collection: find() over `docs`, and watch() that either
+# fails (`watch_errors` remaining, like a standalone server) or streams `changes`
+class FakeCollection:
+    def __init__(self, docs: List[dict], watch_errors: int = 0, find_errors: int = 0):
+        self.docs = docs
+        self.watch_errors = watch_errors
+        self.find_errors = find_errors
+        self.changes: asyncio.Queue = asyncio.Queue()
+        self.finds = 0
+
+    async def _iterate(self):
+        for doc in list(self.docs):
+            yield doc
+
+    def find(self):
+        self.finds += 1
+        if self.find_errors:
+            self.find_errors -= 1
+            raise ConnectionError("server selection timed out")
+        return self._iterate()
+
+    def watch(self, **kwargs):
+        if self.watch_errors:
+            self.watch_errors -= 1
+            raise RuntimeError("The $changeStream stage is only supported on replica sets")
+        return FakeStream(self.changes)
+
+async def eventually(condition, timeout: float = 2):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.005)
+
+def test_load_skips_invalid_documents():
+    async def scenario():
+        index = ValueIndex(60)
+        await index.load(FakeCollection([{"_id": "a", "value": 1}, {"_id": "broken"}, {"_id": "b", "value": 2}]))
+        return index
+
+    index = asyncio.run(scenario())
+    assert sorted(item[0] for item in index.all()) == ["a", "b"]
+
+def test_failed_initial_load_is_retried_once_the_stream_opens():
+    async def scenario():
+        collection = FakeCollection([{"_id": "a", "value": 1}], find_errors=1)
+        index = ValueIndex(60)
+        await index.start(collection)
+        assert index.all() == []
+        await eventually(lambda: index.get("a") == 1)
+        await index.stop()
+
+    asyncio.run(scenario())
+
+def test_change_events_update_the_index_and_bad_ones_are_skipped():
+    async def scenario():
+        collection = FakeCollection([{"_id": "a", "value": 1}])
+        index = ValueIndex(60)
+        await index.start(collection)
+        collection.changes.put_nowait({"fullDocument": {"_id": "broken"}})
+        collection.changes.put_nowait({"fullDocument": {"_id": "b", "value": 2}})
+        await eventually(lambda: index.get("b") == 2)
+        # A delete carries no document, so the index is rebuilt from the collection
+        collection.docs = [{"_id": "b", "value": 2}]
+        collection.changes.put_nowait({"operationType": "delete", "documentKey": {"_id": "a"}})
+        await eventually(lambda: index.get("a") is None)
+        await index.stop()
+
+    asyncio.run(scenario())
+
+def test_unavailable_stream_falls_back_to_reloading_then_reopens():
+    async def scenario():
+        collection = FakeCollection([{"_id": "a", "value": 1}], watch_errors=3)
+        index = ValueIndex(0.01)
+        await index.start(collection)
+        collection.docs = [{"_id": "a", "value": 2}]
+        await eventually(lambda: index.get("a") == 2)
+        # Once the stream opens, changes arrive through it again
+        await eventually(lambda: collection.watch_errors == 0)
+        collection.changes.put_nowait({"fullDocument": {"_id": "c", "value": 3}})
+        await eventually(lambda: index.get("c") == 3)
+        await index.stop()
+
+    asyncio.run(scenario())
+
+def test_stream_error_reopens_the_stream():
+    async def scenario():
+        collection = FakeCollection([{"_id": "a", "value": 1}])
+        index = ValueIndex(0.01)
+        await index.start(collection)
+        collection.changes.put_nowait(ConnectionResetError("connection reset"))
+        collection.docs = [{"_id": "a", "value": 5}]
+        await eventually(lambda: index.get("a") == 5)
+        collection.changes.put_nowait({"fullDocument": {"_id": "d", "value": 4}})
+        await eventually(lambda: index.get("d") == 4)
+        await index.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,55 @@
+import asyncio
+import time
+import httpx
+import pytest
+import app.services as services
+from app.config import config
+from app.tasks import fetch_cycle_readings
+
+LATENCY = 0.2
+
+# A stand-in OpenWeatherMap: answers /weather and /group after LATENCY seconds
+class MockOpenWeatherMap:
+    def __init__(self):
+        self.paths = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.paths.append(request.url.path)
+        await asyncio.sleep(LATENCY)
+        body = {"weather": [{"main": "Clear"}], "main": {"temp": 300.15, "feels_like": 301.15}}
+        if request.url.path.endswith("/group"):
+            ids = [int(city_id) for city_id in request.url.params["id"].split(",")]
+            return httpx.Response(200, json={"cnt": len(ids), "list": [{**body, "id": city_id} for city_id in ids]})
+        return httpx.Response(200, json=body)
+
+@pytest.fixture
+def upstream(monkeypatch):
+    mock = MockOpenWeatherMap()
+    monkeypatch.setattr(services, "_http_client", httpx.AsyncClient(
+        transport=httpx.MockTransport(mock), base_url="http://owm.test"))
+    return mock
+
+def run_cycle():
+    async def scenario():
+        started = time.perf_counter()
+        readings = await fetch_cycle_readings(list(config.CITY_IDS))
+        elapsed = time.perf_counter() - started
+        await services.close_http_client()
+        return readings, elapsed
+    return asyncio.run(scenario())
+
+def test_cities_are_fetched_concurrently(upstream, monkeypatch):
+    monkeypatch.setattr(config, "USE_GROUP_ENDPOINT", False)
+    readings, elapsed = run_cycle()
+    assert sorted(reading.city for reading in readings) == sorted(config.CITY_IDS)
+    assert len(upstream.paths) == len(config.CITY_IDS)
+    # About one round-trip, not one per city
+    assert elapsed < 3 * LATENCY
+    assert round(readings[0].temp, 2) == 27.0
+
+def test_group_endpoint_batches_known_cities(upstream, monkeypatch):
+    monkeypatch.setattr(config, "USE_GROUP_ENDPOINT", True)
+    monkeypatch.setattr(config, "GROUP_BATCH_SIZE", 20)
+    readings, _ = run_cycle()
+    assert sorted(reading.city for reading in readings) == sorted(config.CITY_IDS)
+    assert [path.rsplit("/", 1)[-1] for path in upstream.paths] == ["group"]
@@ -0,0 +1,12 @@
+import logging
+from app.logger import SamplingFilter
+
+def record(pathname: str, lineno: int) -> logging.LogRecord:
+    return logging.LogRecord("main", logging.INFO, pathname, lineno, "message", None, None)
+
+def test_sampling_budget_is_per_file_and_line():
+    sampler = SamplingFilter(window=60, burst=1)
+    assert sampler.filter(record("app/cities.py", 66))
+    assert not sampler.filter(record("app/cities.py", 66))
+    # Same logger and line number in another module has its own budget
+    assert sampler.filter(record("app/collection_index.py", 66))
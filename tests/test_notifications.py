@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+import app.notifications as notifications
+import app.services as services
+from app.models import WeatherData
+from app.notifications import AlertCooldown, BufferedWriter
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs.extend(docs)
+        return SimpleNamespace(inserted_ids=[id(doc) for doc in docs])
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(notifications, "get_db", lambda: {"notifications": collection})
+    return collection
+
+def test_stop_writes_the_batch_held_by_the_writer(collection):
+    async def scenario():
+        writer = BufferedWriter("notifications", flush_size=100, flush_interval=60, max_queue=1000)
+        writer.start()
+        for i in range(7):
+            assert writer.submit({"n": i})
+        # Let the writer take the documents off the queue and wait for more
+        await asyncio.sleep(0.05)
+        assert writer.stats()["queued"] == 0
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [doc["n"] for doc in collection.docs] == list(range(7))
+    assert writer.stats()["written"] == 7
+
+def test_stop_writes_documents_left_in_the_queue(collection):
+    async def scenario():
+        writer = BufferedWriter("notifications", flush_size=2, flush_interval=60, max_queue=1000)
+        writer.start()
+        for i in range(5):
+            writer.submit({"n": i})
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert sorted(doc["n"] for doc in collection.docs) == list(range(5))
+
+def test_flush_interval_writes_a_partial_batch(collection):
+    async def scenario():
+        writer = BufferedWriter("notifications", flush_size=100, flush_interval=0.01, max_queue=1000)
+        writer.start()
+        writer.submit({"n": 1})
+        await asyncio.sleep(0.1)
+        written = len(collection.docs)
+        await writer.stop()
+        return written
+
+    assert asyncio.run(scenario()) == 1
+
+def test_full_queue_sheds_and_counts():
+    writer = BufferedWriter("notifications", flush_size=10, flush_interval=1, max_queue=2)
+    assert writer.submit({"n": 1})
+    assert writer.submit({"n": 2})
+    assert not writer.submit({"n": 3})
+    assert writer.stats()["dropped"] == 1
+
+def test_shed_notification_is_reported_as_503(monkeypatch):
+    monkeypatch.setattr(services.notification_writer, "submit", lambda doc: False)
+    now = datetime.utcnow()
+    reading = WeatherData(city="Delhi", main="Clear", temp=45, feels_like=47, timestamp=now)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(services.create_notification({
+            "city": "Delhi", "message": "ALERT for Delhi", "timestamp": now, "weather_data": reading,
+        }))
+    assert raised.value.status_code == 503
+    assert "Retry-After" in raised.value.headers
+
+def test_cooldown_suppresses_repeats_until_it_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(notifications.time, "monotonic", lambda: now[0])
+    cooldown = AlertCooldown(cooldown=60, max_keys=100)
+    assert cooldown.allow("Delhi", "rule-1")
+    assert not cooldown.allow("Delhi", "rule-1")
+    assert cooldown.allow("Delhi", "rule-2")
+    now[0] += 61
+    assert cooldown.allow("Delhi", "rule-1")
+    assert cooldown.suppressed == 1
+
+def test_cooldown_evicts_expired_and_excess_keys(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(notifications.time, "monotonic", lambda: now[0])
+    cooldown = AlertCooldown(cooldown=60, max_keys=3)
+    for i in range(3):
+        cooldown.allow("Delhi", f"rule-{i}")
+    now[0] += 61
+    cooldown.allow("Delhi", "rule-3")
+    assert len(cooldown._last_sent) == 1
+    for i in range(4, 8):
+        cooldown.allow("Delhi", f"rule-{i}")
+    assert len(cooldown._last_sent) == 3
+    assert cooldown.evicted == 2
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.config import config
+from app.retention import HOURLY_COLLECTION, history_boundary, history_tiers
+from app.database import get_db
+from app.routes import _history_query, get_weather_stats, router
+
+@pytest.fixture(autouse=True)
+def raw_retention(monkeypatch):
+    monkeypatch.setattr(config, "RAW_RETENTION_DAYS", 30)
+
+def test_recent_range_reads_raw_only():
+    query = {"city": "Delhi", "timestamp": {"$gte": datetime.utcnow() - timedelta(days=7)}}
+    assert history_tiers(query) == [(config.WEATHER_COLLECTION, query)]
+
+def test_range_spanning_the_boundary_reads_both_tiers_newest_first():
+    boundary = history_boundary()
+    start = datetime.utcnow() - timedelta(days=60)
+    query = {"city": "Delhi", "timestamp": {"$gte": start}}
+    assert history_tiers(query) == [
+        (config.WEATHER_COLLECTION, {"city": "Delhi", "timestamp": {"$gte": boundary}}),
+        (HOURLY_COLLECTION, {"city": "Delhi", "timestamp": {"$gte": start, "$lt": boundary}}),
+    ]
+
+def test_range_before_the_boundary_reads_hourly_only():
+    boundary = history_boundary()
+    start = datetime.utcnow() - timedelta(days=90)
+    end = datetime.utcnow() - timedelta(days=60)
+    query = {"city": "Delhi", "timestamp": {"$gte": start, "$lte": end}}
+    assert history_tiers(query) == [
+        (HOURLY_COLLECTION, {"city": "Delhi", "timestamp": {"$gte": start, "$lte": end, "$lt": boundary}}),
+    ]
+
+def test_boundary_is_on_the_hour():
+    boundary = history_boundary()
+    assert (boundary.minute, boundary.second, boundary.microsecond) == (0, 0, 0)
+
+def test_disabled_raw_retention_reads_raw_only(monkeypatch):
+    monkeypatch.setattr(config, "RAW_RETENTION_DAYS", 0)
+    query = {"city": "Delhi", "timestamp": {"$gte": datetime(2000, 1, 1)}}
+    assert history_boundary() is None
+    assert history_tiers(query) == [(config.WEATHER_COLLECTION, query)]
+
+def test_stats_reject_ranges_older_than_raw_retention():
+    start = datetime.utcnow() - timedelta(days=31)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(get_weather_stats("Delhi", start_date=start, end_date=None, bucket="day", db=None))
+    assert raised.value.status_code == 400
+
+def test_offset_aware_dates_are_read_as_utc():
+    query = _history_query("Delhi", datetime.fromisoformat("2024-10-01T05:30:00+05:30"), None)
+    assert query["timestamp"]["$gte"] == datetime(2024, 10, 1)
+    assert history_tiers(query)[-1][0] == HOURLY_COLLECTION
+
+def test_stats_with_a_z_suffixed_date_is_rejected_not_failed():
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: None
+    response = TestClient(app).get("/stats/Delhi", params={"start_date": "2024-10-01T00:00:00Z"})
+    assert response.status_code == 400
+
+def test_end_only_range_covers_the_default_days_before_the_end():
+    end = datetime(2024, 10, 1)
+    query = _history_query("Delhi", None, end)
+    assert query["timestamp"] == {"$gte": end - timedelta(days=config.HISTORY_DEFAULT_DAYS), "$lte": end}
@@ -0,0 +1,36 @@
+import math
+from collections import Counter
+from app.sharding import BALANCE, HashRing, shard_of
+
+KEYS = [str(shard) for shard in range(64)]
+
+def test_assign_covers_every_key_within_the_load_bound():
+    members = ["worker-a", "worker-b", "worker-c"]
+    assignment = HashRing(members).assign(KEYS)
+    assert set(assignment) == set(KEYS)
+    assert set(assignment.values()) <= set(members)
+    capacity = math.ceil(BALANCE * len(KEYS) / len(members))
+    assert max(Counter(assignment.values()).values()) <= capacity
+
+def test_assign_is_independent_of_membership_order():
+    members = ["worker-a", "worker-b", "worker-c"]
+    assert HashRing(members).assign(KEYS) == HashRing(reversed(members)).assign(KEYS)
+
+def test_joining_member_moves_a_minority_of_keys():
+    before = HashRing(["worker-a", "worker-b", "worker-c"]).assign(KEYS)
+    after = HashRing(["worker-a", "worker-b", "worker-c", "worker-d"]).assign(KEYS)
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert "worker-d" in after.values()
+    assert len(moved) <= len(KEYS) // 2
+
+def test_single_member_takes_everything():
+    assert set(HashRing(["worker-a"]).assign(KEYS).values()) == {"worker-a"}
+
+def test_empty_ring_assigns_nothing():
+    ring = HashRing([])
+    assert ring.assign(KEYS) == {}
+    assert ring.owner("Delhi") is None
+
+def test_shard_of_is_stable_and_in_range():
+    assert shard_of("Delhi", 64) == shard_of("Delhi", 64)
+    assert all(0 <= shard_of(f"city-{i}", 64) < 64 for i in range(200))